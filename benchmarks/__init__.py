@@ -0,0 +1 @@
+# Benchmarks for Ollama Vision MCP Server
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+HTTP transport load test for Ollama Vision MCP Server
+Starts a stub Ollama and one server process in http mode, then opens many
+concurrent MCP sessions that each initialize and call describe_image
+
+Usage:
+    python benchmarks/load_test.py [--sessions 300] [--calls 2]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from PIL import Image
+
+from benchmarks.stub_ollama import StubOllama, wait_for_port
+
+def make_image(seed: int) -> str:
+    """A small distinct PNG per session, as a base64 string"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (seed % 256, (seed // 256) % 256, 128)).save(buffer, "PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+async def run_session(url: str, index: int, calls: int, latencies: list):
+    image = make_image(index)
+    async with streamablehttp_client(url) as (read_stream, write_stream, _):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            for _ in range(calls):
+                started = time.perf_counter()
+                result = await session.call_tool("describe_image", {"image_path": image})
+                latencies.append(time.perf_counter() - started)
+                if result.content[0].text.startswith("Error"):
+                    raise RuntimeError(result.content[0].text)
+
+async def run(args):
+    stub = StubOllama(latency=args.latency)
+    stub_url = await stub.start(port=args.stub_port)
+
+    env = dict(
+        os.environ,
+        OLLAMA_VISION_OLLAMA_URL=stub_url,
+        OLLAMA_VISION_TRANSPORT="http",
+        OLLAMA_VISION_HTTP_PORT=str(args.port),
+        OLLAMA_VISION_MAX_SESSIONS=str(args.sessions),
+        OLLAMA_VISION_MAX_CONCURRENT_REQUESTS=str(args.concurrency),
+        OLLAMA_VISION_LOG_LEVEL="WARNING",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        await wait_for_port("127.0.0.1", args.port)
+        url = f"http://127.0.0.1:{args.port}/mcp"
+
+        latencies: list = []
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(run_session(url, i, args.calls, latencies) for i in range(args.sessions)),
+            return_exceptions=True
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+        await stub.stop()
+
+    failures = [r for r in results if isinstance(r, BaseException)]
+    print(f"sessions: {args.sessions} ({len(failures)} failed), "
+          f"calls per session: {args.calls}, generate concurrency: {args.concurrency}")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"tool calls: {len(latencies)} in {elapsed:.1f}s "
+              f"({len(latencies) / elapsed:.1f}/s)")
+        print(f"latency: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"p95 {p95 * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+    print(f"stub Ollama generate requests: {stub.requests}")
+    if failures:
+        print(f"first failure: {failures[0]!r}")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP transport load test")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--calls", type=int, default=2, help="Tool calls per session")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Server max_concurrent_requests")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Stub Ollama seconds per generate")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=11437)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
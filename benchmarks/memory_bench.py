@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Memory stress benchmark for Ollama Vision MCP Server
+Preprocesses many large images at once and reports peak RSS for several
+memory budgets. Each budget runs in a fresh process so peaks do not mix.
+
+Usage:
+    python benchmarks/memory_bench.py [--images 20] [--budgets 4096,512,256]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+MB = 1024 * 1024
+
+def make_images(directory: Path, count: int):
+    """Write noisy 16MP JPEGs, close to the 20MB upload limit"""
+    from PIL import Image
+    noise = Image.frombytes("RGB", (4896, 3264), os.urandom(4896 * 3264 * 3))
+    paths = []
+    for i in range(count):
+        path = directory / f"large_{i}.jpg"
+        noise.save(path, quality=85)
+        paths.append(str(path))
+    return paths
+
+async def stress(paths, budget_mb: int):
+    from src.image_handler import ImageHandler
+
+    # Emulate a many-core host: every image may be decoding at the same time
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(len(paths)))
+    handler = ImageHandler(memory_budget=budget_mb * MB, memory_wait_timeout=120)
+    policy = {"max_dimension": 4096, "format": "auto", "quality": 90}
+
+    async def process(path):
+        # Drop the payload right away, as sending it to Ollama would
+        return len(await handler.process_image(path, policy))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(process(p) for p in paths), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    failed = [r for r in results if isinstance(r, BaseException)]
+    # ru_maxrss is in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {"budget_mb": budget_mb, "peak_rss_mb": round(peak / MB), "seconds": round(elapsed, 2),
+            "failed": len(failed), "error": repr(failed[0]) if failed else None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory stress benchmark")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--budgets", default="4096,512,256",
+                        help="Comma-separated memory budgets in MB")
+    parser.add_argument("--child", nargs=2, metavar=("DIR", "BUDGET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        directory, budget = args.child
+        paths = sorted(str(p) for p in Path(directory).glob("*.jpg"))
+        print(json.dumps(asyncio.run(stress(paths, int(budget)))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        make_images(Path(tmp), args.images)
+        size = sum(p.stat().st_size for p in Path(tmp).iterdir())
+        print(f"{args.images} images, {size / MB:.0f} MB on disk")
+        print(f"{'budget MB':>10} {'peak RSS MB':>12} {'seconds':>8} {'failed':>7}")
+        for budget in args.budgets.split(","):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", tmp, budget],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['budget_mb']:>10} {result['peak_rss_mb']:>12} "
+                  f"{result['seconds']:>8} {result['failed']:>7}")
+            if result["error"]:
+                print(f"  {result['error']}")
+
+if __name__ == "__main__":
+    main()
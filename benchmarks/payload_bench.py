@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Request body benchmark for Ollama Vision MCP Server
+Compares building the generate request as one JSON document (base64 string
+inside a dict, serialized by aiohttp's json=) against streaming the body with
+base64 encoded on the fly, measuring time-to-send and peak Python memory.
+The stub Ollama runs in its own process so only the client's memory is traced.
+
+Usage:
+    python benchmarks/payload_bench.py [--sizes 1,5,15] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.stub_ollama import wait_for_port
+from src.config import Config
+from src.ollama_client import OllamaClient
+
+MB = 1024 * 1024
+
+async def send_json(client: OllamaClient, image: bytes):
+    """The previous request path: full base64 string, then json= serialization"""
+    session = await client._get_session()
+    payload = {
+        "model": "llava-phi3:latest",
+        "prompt": "benchmark",
+        "images": [base64.b64encode(image).decode("utf-8")],
+        "stream": False
+    }
+    async with session.post(f"{client.base_url}/api/generate", json=payload) as response:
+        await response.json()
+
+async def send_streaming(client: OllamaClient, image: bytes):
+    await client.analyze_image(image, "benchmark", "llava-phi3:latest")
+
+async def measure(send, client, image: bytes, runs: int):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await send(client, image)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    await send(client, image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+async def run(sizes, runs: int, port: int):
+    # No simulated generation time, so the timings are dominated by sending.
+    # In-process, tracemalloc would also count the stub reading, parsing and
+    # decoding each body.
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_ollama", "--port", str(port),
+         "--latency", "0", "--seconds-per-mb", "0"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    config = Config()
+    config.ollama_url = f"http://127.0.0.1:{port}"
+    client = OllamaClient(config)
+
+    print(f"{'image MB':>8} {'method':<10} {'send ms':>8} {'peak MB':>8}")
+    try:
+        await wait_for_port("127.0.0.1", port)
+        for size_mb in sizes:
+            image = os.urandom(int(size_mb * MB))
+            for name, send in (("json", send_json), ("streaming", send_streaming)):
+                elapsed, peak = await measure(send, client, image, runs)
+                print(f"{size_mb:>8} {name:<10} {elapsed * 1000:>8.0f} {peak / MB:>8.1f}")
+    finally:
+        await client.close()
+        stub.terminate()
+        stub.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Request body benchmark")
+    parser.add_argument("--sizes", default="1,5,15", help="Comma-separated image sizes in MB")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stub-port", type=int, default=11438)
+    args = parser.parse_args()
+    asyncio.run(run([float(s) for s in args.sizes.split(",")], args.runs, args.stub_port))
+
+if __name__ == "__main__":
+    main()
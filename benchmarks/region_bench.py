@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Region-of-interest benchmark for Ollama Vision MCP Server
+Compares analyzing a whole 4K screenshot against zooming into a few regions of
+it, and a first zoom (read + decode) against follow-up zooms from the decoded
+source cache
+
+Usage:
+    python benchmarks/region_bench.py [--runs 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageDraw
+
+from benchmarks.stub_ollama import StubOllama
+from src.config import Config
+from src.image_handler import ImageHandler
+from src.ollama_client import OllamaClient
+
+REGIONS = [
+    {"x": 0, "y": 0, "width": 0.25, "height": 0.1, "units": "normalized", "label": "header"},
+    {"x": 2800, "y": 1200, "width": 900, "height": 400, "label": "dialog"},
+    {"x": 0.7, "y": 0.9, "width": 0.3, "height": 0.1, "units": "normalized", "label": "status"},
+]
+
+def make_screenshot(path: Path):
+    """A 3840x2160 screenshot covered in small text"""
+    image = Image.new("RGB", (3840, 2160), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(140):
+        draw.text((20, 6 + line * 15), f"Row {line}: status ok, latency 12ms, retries 0 " * 8,
+                  fill="black")
+    image.save(path)
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return result, time.perf_counter() - started
+
+async def run(runs: int):
+    stub = StubOllama(latency=0.05, seconds_per_mb=0.5)
+    config = Config()
+    config.ollama_url = await stub.start(port=11439)
+    client = OllamaClient(config)
+    model = "llava:13b"
+    policy = config.resolution_policy(model, "read_text")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "screen.png"
+            make_screenshot(path)
+
+            full_times, full_bytes = [], 0
+            for _ in range(runs):
+                handler = ImageHandler()
+                image, elapsed = await timed(handler.load_image(str(path), policy))
+                _, generate = await timed(client.analyze_image(image, "read", model))
+                full_times.append(elapsed + generate)
+                full_bytes = len(image)
+
+            cold, warm, region_times, region_bytes = [], [], [], 0
+            for _ in range(runs):
+                handler = ImageHandler()
+                _, first = await timed(handler.load_regions(str(path), REGIONS, policy))
+                crops, second = await timed(handler.load_regions(str(path), REGIONS, policy))
+                _, generate = await timed(asyncio.gather(
+                    *(client.analyze_image(crop, "read", model) for crop in crops)
+                ))
+                cold.append(first)
+                warm.append(second)
+                region_times.append(second + generate)
+                region_bytes = sum(len(crop) for crop in crops)
+    finally:
+        await client.close()
+        await stub.stop()
+
+    ms = lambda values: statistics.median(values) * 1000
+    print(f"policy: {policy}")
+    print(f"full frame:        {full_bytes / 1024:8.0f} KB  {ms(full_times):6.0f} ms end to end")
+    print(f"{len(REGIONS)} regions:         {region_bytes / 1024:8.0f} KB  "
+          f"{ms(region_times):6.0f} ms end to end (concurrent, cached source)")
+    print(f"region preprocess: first zoom {ms(cold):.0f} ms, follow-up zoom {ms(warm):.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Region-of-interest benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    asyncio.run(run(parser.parse_args().runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Resolution policy benchmark for Ollama Vision MCP Server
+Compares payload size and end-to-end latency of the fixed 2048px/q95
+preprocessing against the per-model, per-tool resolution policies
+
+Usage:
+    python benchmarks/resolution_bench.py [--runs 3]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image, ImageDraw
+
+from benchmarks.stub_ollama import StubOllama
+from src.config import Config
+from src.image_handler import ImageHandler
+from src.ollama_client import OllamaClient
+
+CASES = [
+    ("photo", "llava-phi3", "describe_image"),
+    ("photo", "llava:13b", "identify_objects"),
+    ("screenshot", "llava-phi3", "read_text"),
+    ("screenshot", "llava:13b", "read_text"),
+    ("screenshot", "llama3.2-vision", "read_text"),
+]
+
+def make_images(directory: Path):
+    """Create a noisy 12MP photo-like image and a 1440p text screenshot"""
+    rng = random.Random(0)
+    photo = Image.new("RGB", (4032, 3024))
+    draw = ImageDraw.Draw(photo)
+    for _ in range(4000):
+        x, y = rng.randrange(4032), rng.randrange(3024)
+        r = rng.randrange(10, 120)
+        color = tuple(rng.randrange(256) for _ in range(3))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    photo.save(directory / "photo.jpg", quality=92)
+
+    screenshot = Image.new("RGB", (2560, 1440), "white")
+    draw = ImageDraw.Draw(screenshot)
+    for line in range(90):
+        draw.text((40, 12 + line * 15), f"Line {line}: the quick brown fox " * 6, fill="black")
+    screenshot.save(directory / "screenshot.png")
+
+    return {"photo": directory / "photo.jpg", "screenshot": directory / "screenshot.png"}
+
+async def measure(handler, client, path: Path, policy, model: str, runs: int):
+    payload_bytes = 0
+    preprocess, end_to_end = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        encoded = await handler.process_image(str(path), policy)
+        processed = time.perf_counter()
+        await client.analyze_image(encoded, "benchmark", model)
+        finished = time.perf_counter()
+        payload_bytes = len(encoded)
+        preprocess.append(processed - started)
+        end_to_end.append(finished - started)
+    return payload_bytes, statistics.median(preprocess), statistics.median(end_to_end)
+
+async def run(runs: int):
+    stub = StubOllama(models=["llava-phi3:latest", "llava:13b", "llama3.2-vision:latest"])
+    config = Config()
+    config.ollama_url = await stub.start(port=11436)
+    client = OllamaClient(config)
+    handler = ImageHandler()
+
+    print(f"{'image':<11} {'model':<16} {'tool':<17} {'policy':<9} "
+          f"{'payload KB':>11} {'prep ms':>8} {'e2e ms':>8}")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            images = make_images(Path(tmp))
+            for image_name, model, tool in CASES:
+                policies = [
+                    ("fixed", ImageHandler.DEFAULT_POLICY),
+                    ("adaptive", config.resolution_policy(model, tool)),
+                ]
+                for policy_name, policy in policies:
+                    size, prep, e2e = await measure(
+                        handler, client, images[image_name], policy, model, runs
+                    )
+                    print(f"{image_name:<11} {model:<16} {tool:<17} {policy_name:<9} "
+                          f"{size / 1024:>11.0f} {prep * 1000:>8.0f} {e2e * 1000:>8.0f}")
+    finally:
+        await client.close()
+        await stub.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolution policy benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
+
+if __name__ == "__main__":
+    main()
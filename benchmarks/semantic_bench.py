@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Semantic cache benchmark for Ollama Vision MCP Server
+Measures lookup latency of a full index, hit rate and precision at several
+thresholds on a stream of reworded prompts, and end-to-end time against the
+stub Ollama with the semantic cache off and on
+
+Usage:
+    python benchmarks/semantic_bench.py [--images 20] [--requests 400]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from benchmarks.stub_ollama import StubOllama, embed_text
+from src.semantic_cache import SemanticCache
+
+# Intents with the ways agents tend to phrase them
+INTENTS = {
+    "describe": [
+        "Describe this image",
+        "Describe the image in detail",
+        "Please describe this image",
+        "Can you describe what is in this image?",
+    ],
+    "objects": [
+        "List the objects in this image",
+        "What objects are in this image?",
+        "List all objects in the image",
+        "Which objects are there in this image",
+    ],
+    "text": [
+        "Read the text in this image",
+        "What text is in the image?",
+        "Read all text in this image",
+        "Extract the text from this image",
+    ],
+    "colors": [
+        "What colors dominate this image?",
+        "Which colors dominate the image",
+        "List the dominant colors in this image",
+        "Describe the dominant colors",
+    ],
+    "people": [
+        "How many people are in this image?",
+        "Count the people in the image",
+        "How many people appear in this image",
+        "Count how many people are visible",
+    ],
+}
+
+def lookup_latency(max_entries: int, dims: int, lookups: int):
+    """Time lookups against a cache filled to max_entries with random vectors"""
+    rng = np.random.default_rng(0)
+    cache = SemanticCache(threshold=0.92, max_entries=max_entries)
+    scopes = max_entries // cache.MAX_PROMPTS_PER_SCOPE
+    for scope in range(scopes):
+        for _ in range(cache.MAX_PROMPTS_PER_SCOPE):
+            cache.add(str(scope), rng.standard_normal(dims), "prompt", "response")
+
+    queries = rng.standard_normal((lookups, dims))
+    timings = []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        cache.lookup(str(i % scopes), query)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return cache.entries, timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+def workload(images: int, requests: int):
+    """(image, intent, prompt) requests with repeats of intents per image"""
+    rng = random.Random(0)
+    return [
+        (rng.randrange(images), intent, rng.choice(INTENTS[intent]))
+        for intent in (rng.choice(list(INTENTS)) for _ in range(requests))
+    ]
+
+def hit_rate(requests, threshold: float):
+    """Replay the workload through the cache, counting hits and wrong answers"""
+    cache = SemanticCache(threshold=threshold, max_entries=2048)
+    hits = wrong = 0
+    for image, intent, prompt in requests:
+        vector = embed_text(prompt)
+        hit = cache.lookup(str(image), vector)
+        if hit is None:
+            cache.add(str(image), vector, prompt, intent)
+        else:
+            hits += 1
+            wrong += hit[0] != intent
+    return hits, wrong
+
+async def end_to_end(requests, images: int, semantic: bool):
+    from src.server import OllamaVisionServer
+
+    stub = StubOllama(latency=0.2)
+    os.environ["OLLAMA_VISION_OLLAMA_URL"] = await stub.start(port=11443)
+    os.environ["OLLAMA_VISION_SEMANTIC_CACHE_ENABLED"] = str(semantic).lower()
+    server = OllamaVisionServer()
+    payloads = [os.urandom(32 * 1024) for _ in range(images)]
+    try:
+        started = time.perf_counter()
+        for image, _, prompt in requests:
+            await server.analyze(payloads[image], prompt)
+        elapsed = time.perf_counter() - started
+    finally:
+        await server.close()
+        await stub.stop()
+    return elapsed, stub.requests
+
+async def run(args):
+    entries, p50, p99 = lookup_latency(2048, 768, 10000)
+    print(f"lookup latency, {entries} entries of 768 dims: "
+          f"p50 {p50 * 1e6:.0f} us, p99 {p99 * 1e6:.0f} us")
+
+    requests = workload(args.images, args.requests)
+    distinct = len({(image, intent) for image, intent, _ in requests})
+    print(f"\n{len(requests)} requests, {distinct} distinct (image, intent) pairs; "
+          f"best possible hit rate {1 - distinct / len(requests):.1%}")
+    print(f"{'threshold':>9} {'hit rate':>9} {'wrong':>6}")
+    for threshold in (0.8, 0.85, 0.9, 0.95):
+        hits, wrong = hit_rate(requests, threshold)
+        print(f"{threshold:>9} {hits / len(requests):>9.1%} {wrong:>6}")
+
+    subset = requests[:args.e2e_requests]
+    print(f"\nend to end, {len(subset)} requests, 0.2s stub generations:")
+    for semantic in (False, True):
+        elapsed, generations = await end_to_end(subset, args.images, semantic)
+        label = "semantic cache" if semantic else "no cache"
+        print(f"  {label:<15} {elapsed:6.1f}s, {generations} generations")
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache benchmark")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--e2e-requests", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for Ollama Vision MCP Server
+Measures import cost and time until the server answers tools/list over stdio
+
+Usage:
+    python benchmarks/startup_bench.py [--runs 5] [--budget 1.5]
+
+Exits with status 1 if the median time-to-tools/list exceeds the budget or if
+a heavy dependency is imported at startup or before tools/list is answered.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ["aiohttp", "aiofiles", "PIL"]
+
+def import_profile():
+    """Return (total import microseconds, eagerly imported heavy modules)"""
+    probe = (
+        "import sys, src.server; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "src.server":
+            total = int(parts[1].strip())
+    eager = [m for m in result.stdout.strip().split(",") if m]
+    return total, eager
+
+# Runs the server with an import hook that reports when each lazy module is
+# first imported, so imports can be compared with when tools/list is answered
+SERVER_PROBE = """
+import sys, time
+class ImportProbe:
+    def find_spec(self, name, path=None, target=None):
+        if name in LAZY_MODULES and name not in sys.modules:
+            sys.stderr.write(f"startup-bench import {{name}} {{time.time()}}\\n")
+            sys.stderr.flush()
+        return None
+LAZY_MODULES = {modules!r}
+sys.meta_path.insert(0, ImportProbe())
+from src.server import main
+main()
+"""
+
+def _send(proc, message):
+    proc.stdin.write(json.dumps(message) + "\n")
+    proc.stdin.flush()
+
+def _read_response(proc, request_id):
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("Server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+def _imports_before(log, deadline: float):
+    """Lazy modules the probe saw imported before the wall-clock deadline"""
+    log.seek(0)
+    imported = []
+    for line in log.read().splitlines():
+        if line.startswith("startup-bench import "):
+            _, _, name, at = line.split()
+            if float(at) <= deadline:
+                imported.append(name)
+    return imported
+
+def time_to_list_tools():
+    """
+    Spawn the server and time initialize + tools/list round trips
+
+    Returns:
+        (seconds to initialize, seconds to tools/list, lazy modules imported
+        before tools/list was answered)
+    """
+    env = dict(os.environ, OLLAMA_VISION_LOG_LEVEL="WARNING")
+    probe = SERVER_PROBE.format(modules=LAZY_MODULES)
+    with tempfile.TemporaryFile(mode="w+") as log:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-c", probe],
+            cwd=ROOT, env=env, text=True,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log
+        )
+        try:
+            _send(proc, {
+                "jsonrpc": "2.0", "id": 1, "method": "initialize",
+                "params": {
+                    "protocolVersion": "2024-11-05",
+                    "capabilities": {},
+                    "clientInfo": {"name": "startup-bench", "version": "1.0"}
+                }
+            })
+            _read_response(proc, 1)
+            initialized = time.perf_counter() - started
+
+            _send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+            _send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+            response = _read_response(proc, 2)
+            listed = time.perf_counter() - started
+            listed_at = time.time()
+            assert response["result"]["tools"], "tools/list returned no tools"
+        finally:
+            proc.stdin.close()
+            proc.terminate()
+            proc.wait()
+        return initialized, listed, _imports_before(log, listed_at)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.5,
+                        help="Maximum median seconds until tools/list is answered")
+    args = parser.parse_args()
+
+    total_us, eager = import_profile()
+    print(f"import src.server: {total_us / 1000:.1f} ms")
+    if eager:
+        print(f"❌ Heavy modules imported at startup: {', '.join(eager)}")
+
+    init_times, list_times, early = [], [], set()
+    for _ in range(args.runs):
+        initialized, listed, imported = time_to_list_tools()
+        init_times.append(initialized)
+        list_times.append(listed)
+        early.update(imported)
+
+    median_list = statistics.median(list_times)
+    print(f"initialize: median {statistics.median(init_times) * 1000:.0f} ms")
+    print(f"tools/list: median {median_list * 1000:.0f} ms "
+          f"(min {min(list_times) * 1000:.0f} ms, budget {args.budget * 1000:.0f} ms)")
+
+    if early:
+        print(f"❌ Imported before tools/list was answered: {', '.join(sorted(early))}")
+
+    if eager or early or median_list > args.budget:
+        print("❌ Startup regression")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Stub Ollama server for benchmarks
+Implements the endpoints the MCP server uses with simulated latency
+
+Usage:
+    python benchmarks/stub_ollama.py [--port 11435] [--latency 0.05]
+
+Point the server at it with OLLAMA_VISION_OLLAMA_URL=http://127.0.0.1:11435
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+import zlib
+
+from aiohttp import web
+
+DEFAULT_MODELS = ["llava-phi3:latest", "llava:7b", "llava:13b"]
+
+STOPWORDS = {"a", "an", "the", "this", "that", "is", "are", "in", "of", "on", "to",
+             "me", "please", "can", "you", "what", "whats", "there", "it", "its"}
+
+def embed_text(text: str, dims: int = 256) -> list:
+    """
+    Deterministic stand-in for an embedding model: hashed content words
+
+    Rewordings that share their content words score high; real embedding
+    models also match synonyms, so hit rates measured with this are a floor.
+    """
+    vector = [0.0] * dims
+    words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+    for word in words:
+        if word not in STOPWORDS:
+            # Crude stemming so "objects" and "object" land together
+            stem = word[:-1] if word.endswith("s") and len(word) > 3 else word
+            vector[zlib.crc32(stem.encode("utf-8")) % dims] += 1.0
+    if not any(vector):
+        vector[0] = 1.0
+    return vector
+
+class StubOllama:
+    """
+    Fake Ollama API
+
+    Generate latency is ``latency`` seconds plus ``seconds_per_mb`` for every
+    megabyte of decoded image data, approximating the cost of shipping and
+    decoding the upload on the Ollama side. A model that is not in ``loaded``
+    takes ``load_seconds`` extra to load.
+    """
+
+    def __init__(self, models=None, latency: float = 0.05, seconds_per_mb: float = 0.02,
+                 load_seconds: float = 0.0):
+        self.models = list(models or DEFAULT_MODELS)
+        self.latency = latency
+        self.seconds_per_mb = seconds_per_mb
+        self.load_seconds = load_seconds
+        self.requests = 0
+        self.embed_requests = 0
+        self.bytes_received = 0
+        self.loaded = set()
+        self.runner = None
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_get("/api/tags", self.handle_tags)
+        app.router.add_get("/api/ps", self.handle_ps)
+        app.router.add_post("/api/generate", self.handle_generate)
+        app.router.add_post("/api/embed", self.handle_embed)
+        return app
+
+    async def handle_tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": m} for m in self.models]})
+
+    async def handle_ps(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": m} for m in sorted(self.loaded)]})
+
+    async def handle_generate(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        body = await request.read()
+        self.requests += 1
+        self.bytes_received += len(body)
+        payload = await request.json()
+
+        model = payload.get("model", "")
+        load_started = time.perf_counter()
+        if model not in self.loaded:
+            await asyncio.sleep(self.load_seconds)
+            self.loaded.add(model)
+        load_duration = int((time.perf_counter() - load_started) * 1e9)
+
+        image_bytes = sum(len(base64.b64decode(i)) for i in payload.get("images", []))
+        if not payload.get("prompt") and not image_bytes:
+            # Like Ollama, a load-only request reports no durations
+            return web.json_response({
+                "model": model, "response": "", "done": True, "done_reason": "load"
+            })
+        await asyncio.sleep(self.latency + self.seconds_per_mb * image_bytes / 1e6)
+
+        response = f"stub response for {image_bytes} image bytes"
+        if payload.get("format"):
+            # Constrained output: a minimal answer that fits the default objects schema
+            response = json.dumps({"objects": [{"label": "stub", "count": 1, "bbox": [0, 0, 100, 100]}]})
+
+        return web.json_response({
+            "model": model,
+            "response": response,
+            "done": True,
+            "load_duration": load_duration,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "eval_count": 16,
+        })
+
+    async def handle_embed(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        texts = payload.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        self.embed_requests += 1
+        return web.json_response({
+            "model": payload.get("model", ""),
+            "embeddings": [embed_text(text) for text in texts],
+        })
+
+    async def start(self, host: str = "127.0.0.1", port: int = 11435) -> str:
+        """Start serving in the current event loop and return the base URL (port 0 picks a free one)"""
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        port = self.runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def wait_for_port(host: str, port: int, timeout: float = 30.0):
+    """Wait until something accepts connections on host:port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not start listening on {host}:{port}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Base seconds per generate request")
+    parser.add_argument("--seconds-per-mb", type=float, default=0.02,
+                        help="Extra seconds per MB of image data")
+    args = parser.parse_args()
+
+    stub = StubOllama(latency=args.latency, seconds_per_mb=args.seconds_per_mb)
+    web.run_app(stub.app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
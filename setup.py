@@ -42,6 +42,14 @@ setup(
         "Pillow>=10.0.0",
     ],
     extras_require={
+        "http": [
+            "mcp>=1.8.0",
+            "starlette>=0.27.0",
+            "uvicorn>=0.23.0",
+        ],
+        "semantic": [
+            "numpy>=1.22.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
@@ -6,10 +6,26 @@ A Model Context Protocol server for computer vision using Ollama
 __version__ = "1.0.0"
 __author__ = "Ollama Vision MCP Contributors"
 
-from .server import OllamaVisionServer, main
-from .ollama_client import OllamaClient
-from .image_handler import ImageHandler
-from .config import Config
+import importlib
+
+# Public names are resolved lazily so that importing the package (for example
+# via ``python -m src.server``) does not load the MCP stack, aiohttp or Pillow
+# until they are actually needed
+_LAZY_EXPORTS = {
+    "OllamaVisionServer": ".server",
+    "main": ".server",
+    "OllamaClient": ".ollama_client",
+    "ImageHandler": ".image_handler",
+    "Config": ".config",
+}
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "OllamaVisionServer",
@@ -0,0 +1,287 @@
+"""
+Batch Directory Scanning for Ollama Vision MCP
+Walks directories lazily and pipelines read -> preprocess -> generate through
+bounded queues, streaming results to JSONL with a resumable checkpoint
+"""
+
+import asyncio
+import fnmatch
+import itertools
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from .image_handler import ImageHandler
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = None
+
+# Paths pulled from the directory walk per executor call
+WALK_BATCH_SIZE = 256
+
+def iter_images(root: str, pattern: str = "*", recursive: bool = True) -> Iterator[str]:
+    """
+    Yield supported image files under root without listing the tree up front
+
+    Args:
+        root: Directory to walk
+        pattern: fnmatch pattern applied to file names
+        recursive: Descend into subdirectories
+    """
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                pending.append(entry.path)
+                        elif (entry.is_file()
+                              and os.path.splitext(entry.name)[1].lower() in ImageHandler.SUPPORTED_FORMATS
+                              and fnmatch.fnmatch(entry.name, pattern)):
+                            yield entry.path
+                    except OSError as e:
+                        logger.warning(f"Skipping {entry.path}: {e}")
+        except OSError as e:
+            logger.warning(f"Cannot scan {directory}: {e}")
+
+class Checkpoint:
+    """Append-only record of images that were analyzed successfully"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.done: Set[str] = set()
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            self.done.add(json.loads(line))
+                        except ValueError:
+                            # A torn final line from an interrupted run
+                            logger.warning(f"Ignoring corrupt checkpoint line in {self.path}")
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __contains__(self, image_path: str) -> bool:
+        return image_path in self.done
+
+    def add(self, image_path: str):
+        """Record a finished image; blocking, so call it from an executor"""
+        self.done.add(image_path)
+        self._file.write(json.dumps(image_path) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class DirectoryScanner:
+    """
+    Runs one vision tool over every image in a directory tree
+
+    Each stage has its own worker count (scan_read_workers,
+    scan_preprocess_workers, scan_generate_workers) and the queues between
+    stages are bounded, so memory stays flat however large the tree is.
+    """
+
+    def __init__(self, server, tool: str = "describe_image",
+                 prompt: Optional[str] = None, model: Optional[str] = None,
+                 options: Optional[Dict[str, Any]] = None):
+        from .server import TOOL_PROMPTS
+        if tool not in TOOL_PROMPTS:
+            raise ValueError(f"Unknown tool: {tool}")
+
+        self.server = server
+        self.config = server.config
+        self.tool = tool
+        self.prompt = prompt or TOOL_PROMPTS[tool]
+        self.model = model
+        self.options = self.config.generation_options(tool, options)
+        self.policy = self.config.resolution_policy(model, tool)
+        self.stats = {"scanned": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+        # Memory budget bytes held by images between reading and preprocessing
+        self._reserved = 0
+
+    async def scan(
+        self,
+        root: str,
+        output_path: str,
+        checkpoint_path: Optional[str] = None,
+        pattern: str = "*",
+        recursive: bool = True,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze images under root, appending one JSON line per image
+
+        Images recorded in the checkpoint are skipped, so rerunning the same
+        command after an interruption resumes where it stopped. Failed images
+        are not checkpointed and are retried on the next run.
+
+        Returns:
+            Summary counts and throughput
+        """
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, os.path.isdir, root):
+            raise FileNotFoundError(f"Directory not found: {root}")
+
+        # File I/O runs in the executor so a slow disk never stalls the
+        # event loop other sessions share
+        checkpoint = await loop.run_in_executor(
+            None, Checkpoint, checkpoint_path or f"{output_path}.checkpoint"
+        )
+        read_workers = self.config.scan_read_workers
+        preprocess_workers = self.config.scan_preprocess_workers
+        generate_workers = self.config.scan_generate_workers
+
+        paths: asyncio.Queue = asyncio.Queue(maxsize=read_workers * 2)
+        raw: asyncio.Queue = asyncio.Queue(maxsize=preprocess_workers * 2)
+        encoded: asyncio.Queue = asyncio.Queue(maxsize=generate_workers * 2)
+        results: asyncio.Queue = asyncio.Queue(maxsize=generate_workers * 2)
+
+        started = time.monotonic()
+        try:
+            output = await loop.run_in_executor(
+                None, lambda: open(output_path, 'a', encoding='utf-8')
+            )
+            try:
+                await asyncio.gather(
+                    self._produce(paths, root, pattern, recursive, limit, checkpoint, read_workers),
+                    self._stage(paths, raw, self._read, read_workers, preprocess_workers, results),
+                    self._stage(raw, encoded, self._preprocess, preprocess_workers, generate_workers, results),
+                    self._stage(encoded, results, self._generate, generate_workers, 1, results),
+                    self._write(results, output, checkpoint)
+                )
+            finally:
+                output.close()
+        finally:
+            checkpoint.close()
+            # Images still queued when the scan stopped give their memory back
+            await self.server.image_handler.memory.release(self._reserved)
+            self._reserved = 0
+
+        elapsed = time.monotonic() - started
+        processed = self.stats["succeeded"] + self.stats["failed"]
+        return {
+            **self.stats,
+            "output_path": output_path,
+            "checkpoint_path": str(checkpoint.path),
+            "elapsed_seconds": round(elapsed, 2),
+            "images_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+        }
+
+    async def _produce(self, paths: asyncio.Queue, root: str, pattern: str,
+                       recursive: bool, limit: Optional[int],
+                       checkpoint: Checkpoint, consumers: int):
+        loop = asyncio.get_running_loop()
+        walk = iter_images(root, pattern, recursive)
+        queued = 0
+        while limit is None or queued < limit:
+            # Walk the tree in the executor, a batch of paths at a time
+            batch = await loop.run_in_executor(
+                None, lambda: list(itertools.islice(walk, WALK_BATCH_SIZE))
+            )
+            if not batch:
+                break
+            for image_path in batch:
+                if image_path in checkpoint:
+                    self.stats["scanned"] += 1
+                    self.stats["skipped"] += 1
+                    continue
+                if limit is not None and queued >= limit:
+                    break
+                self.stats["scanned"] += 1
+                await paths.put({"path": image_path})
+                queued += 1
+        for _ in range(consumers):
+            await paths.put(_DONE)
+
+    async def _stage(self, inbox: asyncio.Queue, outbox: asyncio.Queue, work,
+                     workers: int, consumers: int, results: asyncio.Queue):
+        """Run work() over inbox with several workers; failures skip ahead to results"""
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                try:
+                    await work(item)
+                except Exception as e:
+                    logger.error(f"Failed to analyze {item['path']}: {e}")
+                    await results.put({"path": item["path"], "error": str(e)})
+                    continue
+                await outbox.put(item)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        for _ in range(consumers):
+            await outbox.put(_DONE)
+
+    async def _read(self, item: Dict[str, Any]):
+        # Reserve the image's preprocessing cost, estimated from its header,
+        # before reading it; the reservation is held until it is preprocessed
+        handler = self.server.image_handler
+        loop = asyncio.get_running_loop()
+        cost = await loop.run_in_executor(
+            None, handler.estimate_file_cost, item["path"], self.policy
+        )
+        await handler.memory.acquire(cost)
+        self._reserved += cost
+        try:
+            item["content"] = await handler.read_local_image(item["path"])
+        except BaseException:
+            await self._release(cost)
+            raise
+        item["reserved"] = cost
+
+    async def _preprocess(self, item: Dict[str, Any]):
+        content = item.pop("content")
+        try:
+            item["image_data"] = await self.server.image_handler.process_image_bytes(
+                content, self.policy, reserved=True
+            )
+        finally:
+            await self._release(item.pop("reserved"))
+
+    async def _release(self, cost: int):
+        self._reserved -= cost
+        await self.server.image_handler.memory.release(cost)
+
+    async def _generate(self, item: Dict[str, Any]):
+        started = time.monotonic()
+        item["response"] = await self.server.analyze(
+            item.pop("image_data"), self.prompt, self.model, self.options
+        )
+        item["elapsed"] = round(time.monotonic() - started, 3)
+
+    @staticmethod
+    def _append(output, line: str, checkpoint: Checkpoint, finished: Optional[str]):
+        output.write(line)
+        output.flush()
+        if finished is not None:
+            checkpoint.add(finished)
+
+    async def _write(self, results: asyncio.Queue, output, checkpoint: Checkpoint):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await results.get()
+            if item is _DONE:
+                return
+            record = {"path": item["path"], "tool": self.tool}
+            if "error" in item:
+                record["error"] = item["error"]
+                self.stats["failed"] += 1
+            else:
+                record["model"] = self.model or self.config.default_model
+                record["response"] = item["response"]
+                record["elapsed"] = item["elapsed"]
+                self.stats["succeeded"] += 1
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            finished = None if "error" in item else item["path"]
+            await loop.run_in_executor(None, self._append, output, line, checkpoint, finished)
@@ -6,24 +6,119 @@ import os
 import json
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
 class Config:
-    """Configuration manager for the Ollama Vision MCP server"""
+    """
+    Configuration manager for the Ollama Vision MCP server
+    
+    Settings come from runtime overrides (set_config), then environment
+    variables, then the config file, then defaults. reload() and update()
+    rebuild every setting, validate the result and only then apply it, so an
+    invalid change leaves the last good configuration in place.
+    """
+    
+    # Read once when the server starts; changing them at runtime is recorded
+    # but only takes effect after a restart
+    RESTART_SETTINGS = ("transport", "http_host", "http_port", "preload_models")
+    
+    # Settings that must be greater than zero
+    POSITIVE_SETTINGS = (
+        "timeout", "max_concurrent_requests", "max_connections", "memory_budget_bytes",
+        "max_sessions", "session_max_concurrent_requests", "scan_read_workers",
+        "scan_preprocess_workers", "scan_generate_workers", "keep_alive_interval",
+        "semantic_cache_max_entries",
+    )
+    
+    # Settings whose type may differ from their default's
+    SETTING_TYPES: Dict[str, tuple] = {
+        "keep_alive": (str, int, float),
+    }
     
     def __init__(self, config_path: Optional[str] = None):
         self.config_path = config_path or self._find_config_file()
         self.config_data = self._load_config()
+        self.overrides: Dict[str, Any] = {}
+        self._defaults: Dict[str, Any] = {}
+        self._mtime = self._config_mtime()
+        self._load_values()
         
-        # Set configuration values with defaults
+        # Apply log level
+        logging.getLogger().setLevel(getattr(logging, self.log_level.upper()))
+    
+    def _load_values(self):
+        """Set every setting attribute from overrides, environment, file and defaults"""
         self.ollama_url = self._get_config("ollama_url", "http://localhost:11434")
         self.default_model = self._get_config("default_model", "llava-phi3")
         self.timeout = self._get_config("timeout", 120)  # 2 minutes default
         self.log_level = self._get_config("log_level", "INFO")
         self.cache_enabled = self._get_config("cache_enabled", False)
         self.cache_ttl = self._get_config("cache_ttl", 3600)  # 1 hour
+        self.model_cache_ttl = self._get_config("model_cache_ttl", 60)
+        
+        # Concurrency: generations in flight against Ollama and pooled
+        # connections, shared by every client session of this process
+        self.max_concurrent_requests = self._get_config("max_concurrent_requests", 4)
+        self.max_connections = self._get_config("max_connections", 32)
+        
+        # Memory: bytes all images being preprocessed at once may hold, and
+        # how long a request waits for room before it is rejected
+        self.memory_budget_bytes = self._get_config("memory_budget_bytes", 512 * 1024 * 1024)
+        self.memory_wait_timeout = self._get_config("memory_wait_timeout", 30)
+        
+        # Semantic cache: answer reworded prompts about the same image from
+        # earlier answers, matched by prompt embedding similarity
+        self.semantic_cache_enabled = self._get_config("semantic_cache_enabled", False)
+        self.embedding_model = self._get_config("embedding_model", "nomic-embed-text")
+        self.semantic_cache_threshold = self._get_config("semantic_cache_threshold", 0.92)
+        self.semantic_cache_max_entries = self._get_config("semantic_cache_max_entries", 2048)
+        
+        # Hot reload: seconds between checks of the config file for edits
+        # (0 disables), and whether get_config/set_config tools are offered.
+        # Those let any client retune the server, so they are opt-in.
+        self.config_reload_interval = self._get_config("config_reload_interval", 2)
+        self.admin_tools = self._get_config("admin_tools", False)
+        
+        # Regions: decoded sources kept briefly so follow-up zooms on the same
+        # image skip reading and decoding it again
+        self.region_cache_bytes = self._get_config("region_cache_bytes", 256 * 1024 * 1024)
+        self.region_cache_ttl = self._get_config("region_cache_ttl", 120)
+        
+        # Directory scanning: workers per pipeline stage, and the directory
+        # scan_directory tool outputs are confined to
+        self.scan_output_dir = self._get_config(
+            "scan_output_dir", str(Path.home() / ".ollama-vision-mcp" / "scans")
+        )
+        self.scan_read_workers = self._get_config("scan_read_workers", 4)
+        self.scan_preprocess_workers = self._get_config("scan_preprocess_workers", 2)
+        self.scan_generate_workers = self._get_config("scan_generate_workers", 4)
+        
+        # Transport: "stdio" (one client per process) or "http" (streamable
+        # HTTP and SSE, many clients sharing one warm process)
+        self.transport = self._get_config("transport", "stdio")
+        self.http_host = self._get_config("http_host", "127.0.0.1")
+        self.http_port = self._get_config("http_port", 8765)
+        self.max_sessions = self._get_config("max_sessions", 256)
+        self.session_max_concurrent_requests = self._get_config("session_max_concurrent_requests", 4)
+        
+        # Model residency: preload preferred models at startup and keep the
+        # ones in active use loaded
+        self.preload_models = self._get_config("preload_models", False)
+        self.keep_alive = self._get_config("keep_alive", "30m")
+        self.keep_alive_interval = self._get_config("keep_alive_interval", 60)
+        self.keep_alive_active_window = self._get_config("keep_alive_active_window", 1800)
+        self.cache_path = self._get_config(
+            "cache_path", str(Path.home() / ".ollama-vision-mcp" / "results.db")
+        )
+        self.cache_max_bytes = self._get_config("cache_max_bytes", 256 * 1024 * 1024)
         
         # Vision model preferences in order
         self.model_preferences = self._get_config("model_preferences", [
@@ -33,8 +128,324 @@ class Config:
             "bakllava"
         ])
         
-        # Apply log level
-        logging.getLogger().setLevel(getattr(logging, self.log_level.upper()))
+        # Ollama generation options per tool, merged over the defaults so a
+        # config file only needs to list the settings it changes
+        self.generation_profiles = self._merge_profiles(
+            self._get_config("generation_profiles", {})
+        )
+        
+        # Image resolution and encoding per model family and per tool
+        self.resolution_policies = self._merge_resolution_policies(
+            self._get_config("resolution_policies", {})
+        )
+    
+    def settings(self) -> Dict[str, Any]:
+        """Return the current value of every setting"""
+        return {key: getattr(self, key) for key in self._defaults}
+    
+    def validate(self):
+        """
+        Check every setting's type and range
+        
+        Raises:
+            ValueError: Describing each invalid setting
+        """
+        errors = []
+        for key, default in self._defaults.items():
+            value = getattr(self, key)
+            expected = self.SETTING_TYPES.get(key)
+            if expected is None:
+                if isinstance(default, bool):
+                    expected = (bool,)
+                elif isinstance(default, (int, float)):
+                    expected = (int, float)
+                else:
+                    expected = (type(default),)
+            if isinstance(value, bool) and bool not in expected:
+                errors.append(f"{key} must be a number, got {value!r}")
+            elif not isinstance(value, expected):
+                names = " or ".join(t.__name__ for t in expected)
+                errors.append(f"{key} must be {names}, got {value!r}")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                if key in self.POSITIVE_SETTINGS and value <= 0:
+                    errors.append(f"{key} must be greater than 0, got {value}")
+                elif value < 0 and key != "keep_alive":
+                    errors.append(f"{key} must not be negative, got {value}")
+        
+        threshold = self.semantic_cache_threshold
+        if isinstance(threshold, (int, float)) and not 0 < threshold <= 1:
+            errors.append(f"semantic_cache_threshold must be in (0, 1], got {threshold}")
+        if self.transport not in ("stdio", "http"):
+            errors.append(f"transport must be 'stdio' or 'http', got {self.transport!r}")
+        if not isinstance(logging.getLevelName(str(self.log_level).upper()), int):
+            errors.append(f"log_level is not a logging level: {self.log_level!r}")
+        errors.extend(self._profile_errors())
+        errors.extend(self._policy_errors())
+        if errors:
+            raise ValueError("; ".join(errors))
+    
+    def file_changed(self) -> bool:
+        """Whether the config file was modified since it was last read"""
+        return self._config_mtime() != self._mtime
+    
+    def reload(self) -> Dict[str, Any]:
+        """
+        Re-read the config file and apply it
+        
+        Returns:
+            The settings that changed, with their new values
+            
+        Raises:
+            ValueError: If the file cannot be parsed or a setting is invalid;
+                the current configuration is kept
+        """
+        # Record the attempt so a broken file is reported once, not on every poll
+        self._mtime = self._config_mtime()
+        try:
+            config_data = self._read_config_file()
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read {self.config_path}: {e}")
+        return self._apply(config_data, self.overrides)
+    
+    def update(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Override settings at runtime, above environment and file values
+        
+        Args:
+            settings: Setting names and values; None removes an override
+            
+        Returns:
+            The settings that changed, with their new values
+            
+        Raises:
+            ValueError: If a setting is unknown or invalid; nothing is applied
+        """
+        if not isinstance(settings, dict):
+            raise ValueError("settings must be an object")
+        unknown = sorted(set(settings) - set(self._defaults))
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+        
+        overrides = dict(self.overrides)
+        for key, value in settings.items():
+            if value is None:
+                overrides.pop(key, None)
+            else:
+                overrides[key] = value
+        return self._apply(self.config_data, overrides)
+    
+    def _apply(self, config_data: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """Build and validate a candidate configuration, then swap it in"""
+        candidate = Config.__new__(Config)
+        candidate.config_path = self.config_path
+        candidate.config_data = config_data
+        candidate.overrides = overrides
+        candidate._defaults = {}
+        try:
+            candidate._load_values()
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid configuration: {e}")
+        candidate.validate()
+        
+        # No awaits from here on, so coroutines never see a half-applied config
+        current = self.settings()
+        changed = {
+            key: value for key, value in candidate.settings().items()
+            if current.get(key) != value
+        }
+        for key, value in changed.items():
+            setattr(self, key, value)
+        self.config_data = config_data
+        self.overrides = overrides
+        
+        if "log_level" in changed:
+            logging.getLogger().setLevel(getattr(logging, self.log_level.upper()))
+        if changed:
+            logger.info(f"Applied configuration changes: {', '.join(sorted(changed))}")
+        return changed
+    
+    # Defaults are tuned for latency: short caps for lists, greedy decoding
+    # where the answer should not vary. num_ctx is deliberately left unset,
+    # since changing it forces Ollama to reload the model.
+    DEFAULT_GENERATION_PROFILES: Dict[str, Dict[str, Any]] = {
+        "analyze_image": {"num_predict": 512, "temperature": 0.2},
+        "describe_image": {"num_predict": 384, "temperature": 0.2},
+        "identify_objects": {"num_predict": 160, "temperature": 0},
+        "read_text": {"num_predict": 768, "temperature": 0, "repeat_penalty": 1.0},
+        # Applied over the tool's profile when a schema is requested, since
+        # JSON cut off by num_predict cannot be parsed at all
+        "structured": {"num_predict": 768, "temperature": 0},
+    }
+    
+    def _merge_profiles(self, overrides: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Merge per-tool option overrides over the default profiles
+        
+        Raises:
+            ValueError: If overrides or a tool's options are not objects
+        """
+        if not isinstance(overrides or {}, dict):
+            raise ValueError(f"generation_profiles must be an object, got {overrides!r}")
+        profiles = {tool: dict(opts) for tool, opts in self.DEFAULT_GENERATION_PROFILES.items()}
+        for tool, opts in (overrides or {}).items():
+            if not isinstance(opts or {}, dict):
+                raise ValueError(f"generation_profiles.{tool} must be an object, got {opts!r}")
+            profiles.setdefault(tool, {}).update(opts or {})
+        return profiles
+    
+    def _profile_errors(self) -> List[str]:
+        """Check the option values Ollama would reject or misread"""
+        errors = []
+        for tool, options in self.generation_profiles.items():
+            num_predict = options.get("num_predict")
+            if num_predict is not None and not _is_int(num_predict):
+                errors.append(
+                    f"generation_profiles.{tool}.num_predict must be an integer, got {num_predict!r}"
+                )
+            temperature = options.get("temperature")
+            if temperature is not None and not (_is_number(temperature) and temperature >= 0):
+                errors.append(
+                    f"generation_profiles.{tool}.temperature must be a number >= 0, got {temperature!r}"
+                )
+        return errors
+    
+    def generation_options(
+        self,
+        tool: str,
+        overrides: Optional[Dict[str, Any]] = None,
+        structured: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Get the Ollama options for a tool call
+        
+        Args:
+            tool: Tool name used to pick the profile
+            overrides: Per-call options; a value of None removes the setting
+            structured: The call asks for JSON output, so the "structured"
+                profile applies over the tool's
+            
+        Returns:
+            Options dict for the generate request's "options" field
+        """
+        if overrides is not None and not isinstance(overrides, dict):
+            raise ValueError("options must be an object")
+        options = dict(self.generation_profiles.get(tool, {}))
+        if structured:
+            options.update(self.generation_profiles.get("structured", {}))
+        options.update(overrides or {})
+        return {k: v for k, v in options.items() if v is not None}
+    
+    # Size limits (max_dimension, max_pixels) from every matching layer apply,
+    # so a model family caps what a tool may ask for. Encoding settings
+    # (format, quality) are taken from the tool, then the model, then default.
+    # Most LLaVA-style encoders work at 336px, so anything beyond 2x that is
+    # uploaded only to be thrown away.
+    DEFAULT_RESOLUTION_POLICIES: Dict[str, Dict[str, Any]] = {
+        "default": {"max_dimension": 2048, "format": "auto", "quality": 90},
+        "models": {
+            "llava-phi3": {"max_dimension": 672},
+            "bakllava": {"max_dimension": 672},
+            "llava": {"max_dimension": 1344},
+        },
+        "tools": {
+            "describe_image": {"quality": 85},
+            "identify_objects": {"max_dimension": 1024, "quality": 85},
+            "read_text": {"quality": 95},
+        },
+    }
+    
+    SIZE_LIMIT_KEYS = ("max_dimension", "max_pixels")
+    
+    # Encodings a policy's format may name (any case)
+    POLICY_FORMATS = ("auto", "jpeg", "png", "smallest")
+    
+    def _merge_resolution_policies(self, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge resolution policy overrides over the defaults
+        
+        Raises:
+            ValueError: If overrides, a section or a policy is not an object
+        """
+        defaults = self.DEFAULT_RESOLUTION_POLICIES
+        policies = {
+            "default": dict(defaults["default"]),
+            "models": {k: dict(v) for k, v in defaults["models"].items()},
+            "tools": {k: dict(v) for k, v in defaults["tools"].items()},
+        }
+        overrides = overrides or {}
+        if not isinstance(overrides, dict):
+            raise ValueError(f"resolution_policies must be an object, got {overrides!r}")
+        default = overrides.get("default") or {}
+        if not isinstance(default, dict):
+            raise ValueError(f"resolution_policies.default must be an object, got {default!r}")
+        policies["default"].update(default)
+        for section in ("models", "tools"):
+            layer = overrides.get(section) or {}
+            if not isinstance(layer, dict):
+                raise ValueError(f"resolution_policies.{section} must be an object, got {layer!r}")
+            for name, policy in layer.items():
+                if not isinstance(policy or {}, dict):
+                    raise ValueError(
+                        f"resolution_policies.{section}.{name} must be an object, got {policy!r}"
+                    )
+                policies[section].setdefault(name, {}).update(policy or {})
+        return policies
+    
+    def _policy_errors(self) -> List[str]:
+        """Check policy values before the image handler has to use them"""
+        layers = [("default", self.resolution_policies["default"])]
+        for section in ("models", "tools"):
+            layers.extend(
+                (f"{section}.{name}", policy)
+                for name, policy in self.resolution_policies[section].items()
+            )
+        
+        errors = []
+        for name, policy in layers:
+            where = f"resolution_policies.{name}"
+            for key in self.SIZE_LIMIT_KEYS:
+                value = policy.get(key)
+                if value is not None and not (_is_int(value) and value > 0):
+                    errors.append(f"{where}.{key} must be a positive integer, got {value!r}")
+            quality = policy.get("quality")
+            if quality is not None and not (_is_int(quality) and 1 <= quality <= 100):
+                errors.append(f"{where}.quality must be an integer from 1 to 100, got {quality!r}")
+            image_format = policy.get("format")
+            if image_format is not None and not (
+                isinstance(image_format, str) and image_format.lower() in self.POLICY_FORMATS
+            ):
+                errors.append(
+                    f"{where}.format must be one of auto, JPEG, PNG or smallest, got {image_format!r}"
+                )
+        return errors
+    
+    @staticmethod
+    def model_family(model: str) -> str:
+        """Reduce a model name like 'library/llava:13b' to its family 'llava'"""
+        return model.split(':')[0].split('/')[-1]
+    
+    def resolution_policy(self, model: Optional[str], tool: Optional[str]) -> Dict[str, Any]:
+        """
+        Get the image preprocessing policy for a model and tool
+        
+        Returns:
+            Dict with max_dimension, max_pixels, format and quality
+        """
+        layers = [
+            self.resolution_policies["default"],
+            self.resolution_policies["models"].get(self.model_family(model or self.default_model), {}),
+            self.resolution_policies["tools"].get(tool or "", {}),
+        ]
+        policy: Dict[str, Any] = {}
+        for layer in layers:
+            for key, value in layer.items():
+                if value is None:
+                    continue
+                if key in self.SIZE_LIMIT_KEYS and policy.get(key) is not None:
+                    policy[key] = min(policy[key], value)
+                else:
+                    policy[key] = value
+        return policy
     
     def _find_config_file(self) -> Optional[str]:
         """Find configuration file in standard locations"""
@@ -63,15 +474,36 @@ class Config:
             return {}
             
         try:
-            with open(self.config_path, 'r') as f:
-                return json.load(f)
+            return self._read_config_file()
         except Exception as e:
             logger.warning(f"Failed to load config from {self.config_path}: {e}")
             return {}
     
+    def _read_config_file(self) -> Dict[str, Any]:
+        """Parse the config file, raising on any problem"""
+        if not self.config_path or not Path(self.config_path).exists():
+            return {}
+        with open(self.config_path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("the config file must contain a JSON object")
+        return data
+    
+    def _config_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.config_path).st_mtime_ns if self.config_path else None
+        except OSError:
+            return None
+    
     def _get_config(self, key: str, default: Any) -> Any:
         """Get configuration value with fallback to environment variable and default"""
-        # First check environment variable
+        self._defaults[key] = default
+        
+        # Runtime overrides from set_config win over everything
+        if key in self.overrides:
+            return self.overrides[key]
+        
+        # Then check environment variable
         env_key = f"OLLAMA_VISION_{key.upper()}"
         env_value = os.environ.get(env_key)
         if env_value is not None:
@@ -84,9 +516,21 @@ class Config:
                 except ValueError:
                     logger.warning(f"Invalid integer value for {env_key}: {env_value}")
                     return default
+            elif isinstance(default, float):
+                try:
+                    return float(env_value)
+                except ValueError:
+                    logger.warning(f"Invalid number value for {env_key}: {env_value}")
+                    return default
             elif isinstance(default, list):
                 # Handle comma-separated list
                 return [v.strip() for v in env_value.split(',')]
+            elif isinstance(default, dict):
+                try:
+                    return json.loads(env_value)
+                except ValueError:
+                    logger.warning(f"Invalid JSON value for {env_key}: {env_value}")
+                    return default
             else:
                 return env_value
         
@@ -106,12 +550,44 @@ class Config:
             "log_level": "INFO",
             "cache_enabled": False,
             "cache_ttl": 3600,
+            "model_cache_ttl": 60,
+            "max_concurrent_requests": 4,
+            "max_connections": 32,
+            "memory_budget_bytes": 536870912,
+            "memory_wait_timeout": 30,
+            "semantic_cache_enabled": False,
+            "embedding_model": "nomic-embed-text",
+            "semantic_cache_threshold": 0.92,
+            "semantic_cache_max_entries": 2048,
+            "config_reload_interval": 2,
+            "admin_tools": False,
+            "region_cache_bytes": 268435456,
+            "region_cache_ttl": 120,
+            "scan_output_dir": "~/.ollama-vision-mcp/scans",
+            "scan_read_workers": 4,
+            "scan_preprocess_workers": 2,
+            "scan_generate_workers": 4,
+            "transport": "stdio",
+            "http_host": "127.0.0.1",
+            "http_port": 8765,
+            "max_sessions": 256,
+            "session_max_concurrent_requests": 4,
+            "preload_models": False,
+            "keep_alive": "30m",
+            "keep_alive_interval": 60,
+            "keep_alive_active_window": 1800,
+            "cache_path": "~/.ollama-vision-mcp/results.db",
+            "cache_max_bytes": 268435456,
             "model_preferences": [
                 "llava-phi3",
                 "llava:7b",
                 "llava:13b",
                 "bakllava"
-            ]
+            ],
+            "generation_profiles": {
+                "identify_objects": {"num_predict": 160, "temperature": 0},
+                "read_text": {"num_predict": 768, "temperature": 0}
+            }
         }
         
         save_path = path or "ollama-vision-config.example.json"
@@ -0,0 +1,123 @@
+"""
+HTTP Transport for Ollama Vision MCP
+Serves many MCP sessions from one long-lived process over streamable HTTP
+and SSE, so they share its caches, connection pool and scheduler
+"""
+
+import contextlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAMABLE_HTTP_PATH = "/mcp"
+SSE_PATH = "/sse"
+SSE_MESSAGES_PATH = "/messages/"
+
+class _SessionLimiter:
+    """Counts live sessions across both transports against max_sessions"""
+
+    def __init__(self, manager, config):
+        # The session manager keeps one transport per live streamable session
+        # but has no public count or limit of its own
+        if not isinstance(getattr(manager, "_server_instances", None), dict):
+            raise RuntimeError(
+                "This mcp version's StreamableHTTPSessionManager does not track "
+                "sessions in _server_instances; max_sessions cannot be enforced"
+            )
+        self.manager = manager
+        # Read on every check so max_sessions can be tuned at runtime
+        self.config = config
+        self.sse_sessions = 0
+
+    def active(self) -> int:
+        return len(self.manager._server_instances) + self.sse_sessions
+
+    def full(self) -> bool:
+        return self.active() >= self.config.max_sessions
+
+    def rejection(self):
+        """503 response telling the client to retry once a session ends"""
+        from starlette.responses import JSONResponse
+        logger.warning(f"Rejecting new session, {self.active()} sessions active")
+        return JSONResponse(
+            {"error": "Too many active sessions"},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
+
+class _SessionLimitedEndpoint:
+    """ASGI endpoint that hands requests to the session manager unless full"""
+
+    def __init__(self, manager, limiter):
+        self.manager = manager
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope.get("headers", []))
+        # Only requests without a session id can start a new session
+        if b"mcp-session-id" not in headers and self.limiter.full():
+            await self.limiter.rejection()(scope, receive, send)
+            return
+        await self.manager.handle_request(scope, receive, send)
+
+def build_app(vision_server):
+    """
+    Build the ASGI app serving an OllamaVisionServer
+
+    Streamable HTTP is served at /mcp; the older SSE transport at /sse with
+    client messages posted to /messages/.
+    """
+    from mcp.server.sse import SseServerTransport
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+
+    manager = StreamableHTTPSessionManager(app=vision_server.server)
+    limiter = _SessionLimiter(manager, vision_server.config)
+    sse = SseServerTransport(SSE_MESSAGES_PATH)
+
+    async def handle_sse(request):
+        if limiter.full():
+            return limiter.rejection()
+        limiter.sse_sessions += 1
+        try:
+            async with sse.connect_sse(
+                request.scope, request.receive, request._send
+            ) as (read_stream, write_stream):
+                await vision_server.server.run(
+                    read_stream,
+                    write_stream,
+                    vision_server.initialization_options()
+                )
+        finally:
+            limiter.sse_sessions -= 1
+        return Response()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with manager.run():
+            yield
+
+    return Starlette(
+        routes=[
+            Route(STREAMABLE_HTTP_PATH, endpoint=_SessionLimitedEndpoint(manager, limiter)),
+            Route(SSE_PATH, endpoint=handle_sse, methods=["GET"]),
+            Mount(SSE_MESSAGES_PATH, app=sse.handle_post_message),
+        ],
+        lifespan=lifespan
+    )
+
+async def run_http(vision_server, host: str, port: int):
+    """Serve an OllamaVisionServer over HTTP until cancelled"""
+    import uvicorn
+
+    app = build_app(vision_server)
+    logger.info(f"Serving MCP on http://{host}:{port}{STREAMABLE_HTTP_PATH} and {SSE_PATH}")
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        log_level=vision_server.config.log_level.lower()
+    )
+    await uvicorn.Server(config).serve()
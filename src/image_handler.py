@@ -3,50 +3,227 @@ Image Handler for Ollama Vision MCP
 Handles image loading, validation, and preprocessing
 """
 
+import asyncio
 import base64
+import contextlib
+import hashlib
 import io
 import logging
 import mimetypes
 import os
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
-import aiohttp
-import aiofiles
-from PIL import Image
+# aiohttp, aiofiles and Pillow are imported where they are used so that
+# starting the server (and answering list_tools) does not pay for them
 
 logger = logging.getLogger(__name__)
 
+# A preprocessed image: compressed bytes (or a view of them), or a base64
+# string supplied by the caller and passed through untouched
+ImageData = Union[str, bytes, memoryview]
+
+class MemoryBudget:
+    """
+    Global byte budget for images being preprocessed
+    
+    Each image reserves its estimated peak footprint before it is decoded and
+    releases it once encoded. Callers wait while the budget is exhausted and
+    are rejected after wait_timeout seconds.
+    """
+    
+    def __init__(self, limit_bytes: int, wait_timeout: float = 30.0):
+        self.limit_bytes = limit_bytes
+        self.wait_timeout = wait_timeout
+        self.in_use = 0
+        self._condition: Optional[asyncio.Condition] = None
+    
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+    
+    async def acquire(self, nbytes: int):
+        """Reserve nbytes, waiting for other images to finish if needed"""
+        if nbytes > self.limit_bytes:
+            raise ValueError(
+                f"Image needs an estimated {nbytes} bytes to process, more than "
+                f"the {self.limit_bytes} byte memory budget"
+            )
+        condition = self._get_condition()
+        async with condition:
+            try:
+                await asyncio.wait_for(
+                    condition.wait_for(lambda: self.in_use + nbytes <= self.limit_bytes),
+                    self.wait_timeout
+                )
+            except asyncio.TimeoutError:
+                raise RuntimeError(
+                    f"Timed out after {self.wait_timeout}s waiting for image memory "
+                    f"({self.in_use} of {self.limit_bytes} bytes in use)"
+                )
+            self.in_use += nbytes
+    
+    async def release(self, nbytes: int):
+        condition = self._get_condition()
+        async with condition:
+            self.in_use -= nbytes
+            condition.notify_all()
+    
+    async def resize(self, limit_bytes: int, wait_timeout: float):
+        """Change the budget; waiters that now fit are woken up"""
+        condition = self._get_condition()
+        async with condition:
+            self.limit_bytes = limit_bytes
+            self.wait_timeout = wait_timeout
+            condition.notify_all()
+    
+    @contextlib.asynccontextmanager
+    async def reserve(self, nbytes: int):
+        await self.acquire(nbytes)
+        try:
+            yield
+        finally:
+            await self.release(nbytes)
+
+class DecodedImageCache:
+    """
+    Short-lived LRU of decoded source images for region crops
+    
+    Follow-up zooms on the same image reuse the decoded pixels instead of
+    reading and decoding the file again. Entries expire after ttl seconds and
+    the least recently used are dropped once max_bytes of pixels are held.
+    """
+    
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl: float = 120.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+    
+    @staticmethod
+    def image_bytes(image) -> int:
+        width, height = image.size
+        return width * height * len(image.getbands())
+    
+    def get(self, key: str):
+        """Return the cached image for key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        image, nbytes, expires = entry
+        if time.monotonic() > expires:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return image
+    
+    def put(self, key: str, image):
+        """Cache a decoded image, evicting the oldest entries to stay in budget"""
+        nbytes = self.image_bytes(image)
+        if self.ttl <= 0 or nbytes > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (image, nbytes, time.monotonic() + self.ttl)
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+    
+    def resize(self, max_bytes: int, ttl: float):
+        """Change the limits, evicting entries that no longer fit"""
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        if ttl <= 0:
+            self.clear()
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+    
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
 class ImageHandler:
     # Supported image formats
     SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp'}
     MAX_IMAGE_SIZE = 20 * 1024 * 1024  # 20MB
     
-    def __init__(self):
-        """Initialize the image handler"""
-        pass
+    # Most regions analyzed from one image in a single call
+    MAX_REGIONS = 16
+    
+    # Preprocessing used when the caller does not pass a resolution policy
+    DEFAULT_POLICY: Dict[str, Any] = {"max_dimension": 2048, "format": "auto", "quality": 95}
+    
+    def __init__(
+        self,
+        memory_budget: int = 512 * 1024 * 1024,
+        memory_wait_timeout: float = 30.0,
+        region_cache_bytes: int = 256 * 1024 * 1024,
+        region_cache_ttl: float = 120.0
+    ):
+        """
+        Initialize the image handler
+        
+        Args:
+            memory_budget: Bytes all concurrently processed images may use
+            memory_wait_timeout: Seconds to wait for budget before rejecting
+            region_cache_bytes: Pixel bytes of decoded sources kept for region crops
+            region_cache_ttl: Seconds a decoded source stays cached
+        """
+        self.memory = MemoryBudget(memory_budget, memory_wait_timeout)
+        self.decoded = DecodedImageCache(region_cache_bytes, region_cache_ttl)
     
-    async def process_image(self, image_path: str) -> str:
+    async def process_image(
+        self,
+        image_path: str,
+        policy: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Process an image from various sources and return base64 encoded data
         
         Args:
             image_path: Path to local file, URL, or base64 string
+            policy: Resolution policy (max_dimension, max_pixels, format, quality)
             
         Returns:
             Base64 encoded image data
         """
+        image_data = await self.load_image(image_path, policy)
+        if isinstance(image_data, str):
+            return image_data
+        return base64.b64encode(image_data).decode('ascii')
+    
+    async def load_image(
+        self,
+        image_path: str,
+        policy: Optional[Dict[str, Any]] = None
+    ) -> ImageData:
+        """
+        Process an image from various sources without base64 encoding it
+        
+        The Ollama client encodes compressed bytes on the fly while sending,
+        so the full base64 string never has to exist in memory.
+        
+        Returns:
+            Compressed image bytes, or the input itself if it was base64
+        """
         # Check if already base64
         if self._is_base64(image_path):
             return image_path
             
         # Check if URL
         if self._is_url(image_path):
-            return await self._download_and_encode(image_path)
+            return await self._download_and_encode(image_path, policy)
             
         # Handle local file
-        return await self._load_local_image(image_path)
+        return await self._load_local_image(image_path, policy)
     
     def _is_base64(self, data: str) -> bool:
         """Check if string is base64 encoded"""
@@ -69,8 +246,18 @@ class ImageHandler:
         except:
             return False
     
-    async def _download_and_encode(self, url: str) -> str:
-        """Download image from URL and encode to base64"""
+    async def _download_and_encode(
+        self,
+        url: str,
+        policy: Optional[Dict[str, Any]] = None
+    ) -> ImageData:
+        """Download and preprocess an image from a URL"""
+        content = await self._download(url)
+        return await self.process_image_bytes(content, policy)
+    
+    async def _download(self, url: str) -> bytes:
+        """Download an image and return its raw bytes"""
+        import aiohttp
         try:
             async with aiohttp.ClientSession() as session:
                 async with session.get(url) as response:
@@ -86,46 +273,142 @@ class ImageHandler:
                     if not content_type.startswith('image/'):
                         raise ValueError(f"Invalid content type: {content_type}")
                     
-                    # Process and encode
-                    return await self._process_image_bytes(content)
+                    return content
                     
         except Exception as e:
             logger.error(f"Error downloading image from {url}: {e}")
             raise
     
-    async def _load_local_image(self, path: str) -> str:
-        """Load and encode a local image file"""
+    async def _load_local_image(
+        self,
+        path: str,
+        policy: Optional[Dict[str, Any]] = None
+    ) -> ImageData:
+        """Load and preprocess a local image file"""
+        policy = policy or self.DEFAULT_POLICY
         try:
-            # Resolve path
-            file_path = Path(path).resolve()
-            
-            # Check if file exists
-            if not file_path.exists():
-                raise FileNotFoundError(f"Image file not found: {path}")
-            
-            # Check file extension
-            if file_path.suffix.lower() not in self.SUPPORTED_FORMATS:
-                raise ValueError(f"Unsupported image format: {file_path.suffix}")
-            
-            # Check file size
-            file_size = file_path.stat().st_size
-            if file_size > self.MAX_IMAGE_SIZE:
-                raise ValueError(f"Image too large: {file_size} bytes")
-            
-            # Read and encode
-            async with aiofiles.open(file_path, 'rb') as f:
-                content = await f.read()
-                return await self._process_image_bytes(content)
-                
+            # Reserve memory from the file header before reading the file
+            # itself; the header read runs in the executor like the decode
+            loop = asyncio.get_running_loop()
+            cost = await loop.run_in_executor(None, self.estimate_file_cost, path, policy)
+            async with self.memory.reserve(cost):
+                content = await self.read_local_image(path)
+                return await self._process_in_executor(content, policy)
         except Exception as e:
             logger.error(f"Error loading local image {path}: {e}")
             raise
     
-    async def _process_image_bytes(self, content: bytes) -> str:
-        """Process image bytes and return base64 encoded string"""
+    def estimate_file_cost(self, path: str, policy: Optional[Dict[str, Any]] = None) -> int:
+        """Estimate the preprocessing cost of a local image from its header alone"""
+        from PIL import Image
+        file_path = self._validate_local_path(path)
+        with Image.open(file_path) as header:
+            return self.estimate_cost(header, file_path.stat().st_size, policy or self.DEFAULT_POLICY)
+    
+    async def read_local_image(self, path: str) -> bytes:
+        """Validate a local image file and return its raw bytes"""
+        import aiofiles
+        
+        file_path = self._validate_local_path(path)
+        async with aiofiles.open(file_path, 'rb') as f:
+            return await f.read()
+    
+    def _validate_local_path(self, path: str) -> Path:
+        """Check that a local image exists, is supported and within size limits"""
+        # Resolve path
+        file_path = Path(path).resolve()
+        
+        # Check if file exists
+        if not file_path.exists():
+            raise FileNotFoundError(f"Image file not found: {path}")
+        
+        # Check file extension
+        if file_path.suffix.lower() not in self.SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported image format: {file_path.suffix}")
+        
+        # Check file size
+        file_size = file_path.stat().st_size
+        if file_size > self.MAX_IMAGE_SIZE:
+            raise ValueError(f"Image too large: {file_size} bytes")
+        
+        return file_path
+    
+    async def process_image_bytes(
+        self,
+        content: bytes,
+        policy: Optional[Dict[str, Any]] = None,
+        reserved: bool = False
+    ) -> ImageData:
+        """
+        Preprocess raw image bytes and return the compressed result
+        
+        Args:
+            content: Raw image bytes
+            policy: Resolution policy
+            reserved: The caller already holds a memory budget reservation
+                for this image (see estimate_file_cost)
+        """
+        from PIL import Image
+        policy = policy or self.DEFAULT_POLICY
+        if reserved:
+            return await self._process_in_executor(content, policy)
+        
+        # Opening only parses the header, so the cost is known before decoding
+        try:
+            header = Image.open(io.BytesIO(content))
+        except Exception as e:
+            logger.error(f"Error processing image: {e}")
+            raise
+        cost = self.estimate_cost(header, len(content), policy)
+        
+        async with self.memory.reserve(cost):
+            return await self._process_in_executor(content, policy)
+    
+    async def _process_in_executor(self, content: bytes, policy: Dict[str, Any]) -> ImageData:
+        # Decoding and resampling release the GIL, so running them in the
+        # default executor keeps the event loop free and lets several
+        # images be preprocessed in parallel
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._process_image_sync, content, policy
+        )
+    
+    def estimate_cost(self, image, content_size: int, policy: Dict[str, Any]) -> int:
+        """
+        Estimate peak bytes held while preprocessing an opened (undecoded) image
+        
+        Covers the raw bytes, the decoded pixels (at JPEG draft scale when it
+        applies), an RGB copy for alpha images, the resized pixels and the
+        encoded output.
+        """
+        width, height = image.size
+        bands = len(image.getbands())
+        target_w, target_h = self._target_size(image.size, policy)
+        
+        scale = 1
+        if image.format == 'JPEG':
+            while scale < 8 and width // (scale * 2) >= target_w and height // (scale * 2) >= target_h:
+                scale *= 2
+        decoded = (width // scale) * (height // scale) * max(bands, 3)
+        converted = (width // scale) * (height // scale) * 3 if bands == 4 else 0
+        resized = target_w * target_h * 3
+        # Compressed output is bounded well below raw pixels; assume half
+        encoded = resized // 2
+        return content_size + decoded + converted + resized + encoded
+    
+    def _process_image_sync(self, content: bytes, policy: Dict[str, Any]) -> ImageData:
+        from PIL import Image
         try:
             # Open image with PIL for validation and potential preprocessing
             image = Image.open(io.BytesIO(content))
+            source_format = image.format
+            original_size = image.size
+            target = self._target_size(image.size, policy)
+            
+            # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still
+            # covers the target size, instead of decoding every pixel
+            if source_format == 'JPEG' and target != original_size:
+                image.draft('RGB', target)
             
             # Convert RGBA to RGB if needed (for JPEG compatibility)
             if image.mode == 'RGBA':
@@ -133,25 +416,198 @@ class ImageHandler:
                 rgb_image.paste(image, mask=image.split()[3])
                 image = rgb_image
             
-            # Resize if too large (optional optimization)
-            max_dimension = 2048
-            if max(image.size) > max_dimension:
-                image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
-                logger.info(f"Resized image to {image.size}")
+            # Downscale to the policy's dimension and pixel budget
+            if target != image.size:
+                image.thumbnail(target, Image.Resampling.LANCZOS)
+                logger.info(f"Resized image from {original_size} to {image.size}")
             
-            # Convert back to bytes
-            buffer = io.BytesIO()
-            format = 'JPEG' if image.mode == 'RGB' else 'PNG'
-            image.save(buffer, format=format, quality=95 if format == 'JPEG' else None)
-            buffer.seek(0)
+            encoded_bytes = self._encode(image, policy)
             
-            # Encode to base64
-            encoded = base64.b64encode(buffer.read()).decode('utf-8')
-            return encoded
+            # An untouched JPEG/PNG source can be smaller than our re-encode
+            if (target == original_size and source_format in ('JPEG', 'PNG')
+                    and len(content) <= len(encoded_bytes)):
+                encoded_bytes = content
             
+            return encoded_bytes
+            
+        except Exception as e:
+            logger.error(f"Error processing image: {e}")
+            raise
+    
+    async def load_regions(
+        self,
+        image_path: str,
+        regions: List[Dict[str, Any]],
+        policy: Optional[Dict[str, Any]] = None
+    ) -> List[ImageData]:
+        """
+        Crop regions out of one image at native resolution
+        
+        The source is decoded once, or taken from the decoded cache, and each
+        crop is only scaled down if it exceeds the policy's limits, so small
+        regions keep their full detail.
+        
+        Args:
+            image_path: Path to local file, URL, or base64 string
+            regions: Boxes with x, y, width and height in pixels, or as
+                fractions of the image size when units is "normalized"
+            policy: Resolution policy applied to each crop
+        
+        Returns:
+            Compressed image data for each region, in order
+        """
+        if not isinstance(regions, list) or not regions:
+            raise ValueError("regions must be a non-empty list")
+        if len(regions) > self.MAX_REGIONS:
+            raise ValueError(f"At most {self.MAX_REGIONS} regions per call, got {len(regions)}")
+        policy = policy or self.DEFAULT_POLICY
+        
+        image = await self._decode_source(image_path)
+        boxes = [self.region_box(region, image.size) for region in regions]
+        return list(await asyncio.gather(
+            *(self._crop(image, box, policy) for box in boxes)
+        ))
+    
+    @staticmethod
+    def region_box(region: Dict[str, Any], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """Convert a region to a (left, top, right, bottom) pixel box within the image"""
+        try:
+            x, y = float(region["x"]), float(region["y"])
+            width, height = float(region["width"]), float(region["height"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Region needs numeric x, y, width and height: {region}")
+        
+        units = region.get("units", "pixels")
+        if units == "normalized":
+            x, width = x * size[0], width * size[0]
+            y, height = y * size[1], height * size[1]
+        elif units != "pixels":
+            raise ValueError(f"Unknown region units: {units}")
+        
+        left, top = max(0, int(x)), max(0, int(y))
+        right = min(size[0], int(round(x + width)))
+        bottom = min(size[1], int(round(y + height)))
+        if right <= left or bottom <= top:
+            raise ValueError(f"Region {region} lies outside the {size[0]}x{size[1]} image")
+        return left, top, right, bottom
+    
+    async def _decode_source(self, image_path: str):
+        """Return the fully decoded source image, from the cache when possible"""
+        from PIL import Image
+        key = self._source_key(image_path)
+        image = self.decoded.get(key)
+        if image is not None:
+            logger.debug(f"Decoded image cache hit for {key[:12]}")
+            return image
+        
+        content = await self._read_source(image_path)
+        try:
+            header = Image.open(io.BytesIO(content))
         except Exception as e:
             logger.error(f"Error processing image: {e}")
             raise
+        # Raw bytes, the decoded pixels and an RGB copy for alpha images
+        width, height = header.size
+        bands = len(header.getbands())
+        cost = len(content) + width * height * max(bands, 3)
+        if bands == 4:
+            cost += width * height * 3
+        
+        async with self.memory.reserve(cost):
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(None, self._decode_sync, content)
+        self.decoded.put(key, image)
+        return image
+    
+    def _source_key(self, image_path: str) -> str:
+        """Identify a source so edits to a local file miss the decoded cache"""
+        if self._is_base64(image_path) or self._is_url(image_path):
+            material = image_path
+        else:
+            file_path = self._validate_local_path(image_path)
+            stat = file_path.stat()
+            material = f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    async def _read_source(self, image_path: str) -> bytes:
+        """Return the raw bytes of a local file, URL or base64 string"""
+        if self._is_base64(image_path):
+            if image_path.startswith('data:'):
+                image_path = image_path.split(',', 1)[1]
+            return base64.b64decode(image_path)
+        if self._is_url(image_path):
+            return await self._download(image_path)
+        return await self.read_local_image(image_path)
+    
+    @staticmethod
+    def _decode_sync(content: bytes):
+        from PIL import Image
+        image = Image.open(io.BytesIO(content))
+        image.load()
+        if image.mode == 'RGBA':
+            rgb_image = Image.new('RGB', image.size, (255, 255, 255))
+            rgb_image.paste(image, mask=image.split()[3])
+            image = rgb_image
+        return image
+    
+    async def _crop(self, image, box: Tuple[int, int, int, int], policy: Dict[str, Any]) -> ImageData:
+        width, height = box[2] - box[0], box[3] - box[1]
+        target_w, target_h = self._target_size((width, height), policy)
+        # The cropped pixels, the resized copy and the encoded output
+        cost = width * height * max(len(image.getbands()), 3) + target_w * target_h * 3 * 3 // 2
+        async with self.memory.reserve(cost):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._crop_sync, image, box, policy)
+    
+    def _crop_sync(self, image, box: Tuple[int, int, int, int], policy: Dict[str, Any]) -> ImageData:
+        from PIL import Image
+        region = image.crop(box)
+        target = self._target_size(region.size, policy)
+        if target != region.size:
+            region.thumbnail(target, Image.Resampling.LANCZOS)
+        return self._encode(region, policy)
+    
+    @staticmethod
+    def _target_size(size, policy: Dict[str, Any]):
+        """Compute the largest size within the policy's limits"""
+        width, height = size
+        scale = 1.0
+        max_dimension = policy.get("max_dimension")
+        if max_dimension and max(width, height) > max_dimension:
+            scale = max_dimension / max(width, height)
+        max_pixels = policy.get("max_pixels")
+        if max_pixels and width * height * scale * scale > max_pixels:
+            scale = (max_pixels / (width * height)) ** 0.5
+        if scale >= 1.0:
+            return size
+        return (max(1, int(width * scale)), max(1, int(height * scale)))
+    
+    @staticmethod
+    def _encode(image, policy: Dict[str, Any]) -> memoryview:
+        """Encode an image using the policy's format and quality"""
+        image_format = policy.get("format", "auto").upper()
+        quality = policy.get("quality", 95)
+        if image.mode != 'RGB':
+            # JPEG cannot hold alpha or palette data faithfully
+            image_format = 'PNG'
+        
+        if image_format == 'SMALLEST':
+            png = ImageHandler._save(image, 'PNG', quality)
+            jpeg = ImageHandler._save(image, 'JPEG', quality)
+            return png if len(png) < len(jpeg) else jpeg
+        if image_format not in ('JPEG', 'PNG'):
+            image_format = 'JPEG'
+        return ImageHandler._save(image, image_format, quality)
+    
+    @staticmethod
+    def _save(image, image_format: str, quality: int) -> memoryview:
+        """Encode into a buffer and return a view of it without copying"""
+        buffer = io.BytesIO()
+        if image_format == 'JPEG':
+            image.save(buffer, format='JPEG', quality=quality)
+        else:
+            image.save(buffer, format='PNG', optimize=False)
+        return buffer.getbuffer()
     
     def validate_image_path(self, path: str) -> bool:
         """Validate if path points to a valid image"""
@@ -3,27 +3,180 @@ Ollama API Client for Vision Models
 Handles communication with Ollama API for image analysis
 """
 
-import aiohttp
 import asyncio
 import base64
+import importlib
 import json
 import logging
-from typing import Dict, Optional, Any, List
+import time
+from typing import AsyncIterator, Dict, Optional, Any, List, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+# Raw bytes per base64 chunk written to the request body; a multiple of 3 so
+# chunks concatenate into one valid base64 string
+STREAM_CHUNK_SIZE = 48 * 1024
+
+def generate_body(
+    payload: Dict[str, Any],
+    images: List[Union[str, bytes, memoryview]]
+) -> Tuple[int, AsyncIterator[bytes]]:
+    """
+    Serialize a generate request with images encoded while it is sent
+    
+    The body is the JSON for payload with an "images" array appended. Raw
+    image bytes are base64-encoded chunk by chunk as the body is written, so
+    neither the base64 string nor the serialized JSON is built in memory.
+    Strings are taken to be base64 already and are sent as they are.
+    
+    Returns:
+        (content length, async iterator over body chunks)
+    """
+    head = json.dumps(payload, separators=(',', ':'))
+    prefix = (head[:-1] + (',' if payload else '') + '"images":["').encode('utf-8')
+    separator = b'","'
+    suffix = b'"]}'
+    
+    length = len(prefix) + len(suffix) + len(separator) * max(len(images) - 1, 0)
+    for image in images:
+        if isinstance(image, str):
+            length += len(image)
+        else:
+            length += (len(image) + 2) // 3 * 4
+    
+    async def chunks() -> AsyncIterator[bytes]:
+        yield prefix
+        for index, image in enumerate(images):
+            if index:
+                yield separator
+            if isinstance(image, str):
+                step = STREAM_CHUNK_SIZE // 3 * 4
+                for start in range(0, len(image), step):
+                    yield image[start:start + step].encode('ascii')
+            else:
+                view = memoryview(image)
+                for start in range(0, len(view), STREAM_CHUNK_SIZE):
+                    yield base64.b64encode(view[start:start + STREAM_CHUNK_SIZE])
+        yield suffix
+    
+    return length, chunks()
+
 class OllamaClient:
     def __init__(self, config):
         self.config = config
         self.base_url = config.ollama_url
-        self.timeout = aiohttp.ClientTimeout(total=config.timeout)
+        self._timeout = None
+        
+        # One pooled HTTP session per client, shared by every MCP session the
+        # server handles, and a scheduler bounding concurrent generations.
+        # Sessions replaced by a config change wait in _retired_sessions
+        # until a close is scheduled for them in _close_timers.
+        self._session = None
+        self._retired_sessions: List[Any] = []
+        self._close_timers: Dict[Any, asyncio.TimerHandle] = {}
+        self._generate_slots: Optional[asyncio.Semaphore] = None
+        
+        # Cached vision model list, refreshed at most every model_cache_ttl seconds
+        self._models: Optional[List[str]] = None
+        self._models_fetched_at = 0.0
+        self._models_lock: Optional[asyncio.Lock] = None
+        
+        # When each model last served (or was preloaded for) a request
+        self._last_used: Dict[str, float] = {}
+        
+        # Model load time paid during preloading is reported separately from
+        # load time paid inside user requests
+        self.stats = {
+            "requests": 0,
+            "request_seconds": 0.0,
+            "request_load_seconds": 0.0,
+            "cold_requests": 0,
+            "preloads": 0,
+            "preload_seconds": 0.0,
+            "keep_alive_refreshes": 0,
+        }
+        
+    @property
+    def timeout(self):
+        """aiohttp timeout, built on first use so aiohttp is imported lazily"""
+        if self._timeout is None:
+            import aiohttp
+            self._timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        return self._timeout
+    
+    async def _get_session(self):
+        """Return the shared aiohttp session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self.config.max_connections,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=connector
+            )
+            self._close_retired_sessions()
+        return self._session
+    
+    def _close_retired_sessions(self):
+        # Requests started on a retired session may still be running, so it
+        # is closed only once they would have timed out anyway. They were
+        # started under the session's own timeout, not the new one.
+        loop = asyncio.get_running_loop()
+        for session in self._retired_sessions:
+            self._close_timers[session] = loop.call_later(
+                session.timeout.total, self._close_retired, session
+            )
+        self._retired_sessions.clear()
+    
+    def _close_retired(self, session):
+        self._close_timers.pop(session, None)
+        asyncio.ensure_future(session.close())
+    
+    async def close(self):
+        """Close the shared HTTP session and any retired ones"""
+        for timer in self._close_timers.values():
+            timer.cancel()
+        sessions = [self._session] + self._retired_sessions + list(self._close_timers)
+        for session in sessions:
+            if session is not None and not session.closed:
+                await session.close()
+        self._session = None
+        self._retired_sessions.clear()
+        self._close_timers.clear()
+    
+    def apply_config(self, changed: Dict[str, Any]):
+        """
+        Pick up configuration changes without dropping requests in flight
         
+        The HTTP session is replaced when its timeout or pool size changes;
+        the old one keeps serving its requests and is closed afterwards. A new
+        generate scheduler applies to requests that have not started yet.
+        """
+        if "ollama_url" in changed:
+            self.base_url = self.config.ollama_url
+            self._models = None
+        if "timeout" in changed:
+            self._timeout = None
+        if "timeout" in changed or "max_connections" in changed:
+            if self._session is not None and not self._session.closed:
+                self._retired_sessions.append(self._session)
+            self._session = None
+        if "max_concurrent_requests" in changed:
+            self._generate_slots = None
+    
+    def _generate_scheduler(self) -> asyncio.Semaphore:
+        if self._generate_slots is None:
+            self._generate_slots = asyncio.Semaphore(self.config.max_concurrent_requests)
+        return self._generate_slots
+    
     async def check_connection(self) -> bool:
         """Check if Ollama is running and accessible"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(f"{self.base_url}/api/tags") as response:
-                    return response.status == 200
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/tags") as response:
+                return response.status == 200
         except Exception as e:
             logger.error(f"Failed to connect to Ollama: {e}")
             return False
@@ -31,63 +184,132 @@ class OllamaClient:
     async def list_models(self) -> List[str]:
         """List available vision models"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(f"{self.base_url}/api/tags") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        models = data.get("models", [])
-                        # Filter for vision models
-                        vision_models = []
-                        for model in models:
-                            name = model.get("name", "")
-                            if any(vm in name for vm in ["llava", "bakllava", "vision"]):
-                                vision_models.append(name)
-                        return vision_models
-                    return []
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/tags") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    models = data.get("models", [])
+                    # Filter for vision models
+                    vision_models = []
+                    for model in models:
+                        name = model.get("name", "")
+                        if any(vm in name for vm in ["llava", "bakllava", "vision"]):
+                            vision_models.append(name)
+                    self._models = vision_models
+                    self._models_fetched_at = time.monotonic()
+                    return vision_models
+                return []
         except Exception as e:
             logger.error(f"Failed to list models: {e}")
             return []
     
+    async def available_models(self, refresh: bool = False) -> List[str]:
+        """Return the cached vision model list, fetching it when stale"""
+        if self._models_lock is None:
+            self._models_lock = asyncio.Lock()
+        
+        async with self._models_lock:
+            age = time.monotonic() - self._models_fetched_at
+            if refresh or self._models is None or age > self.config.model_cache_ttl:
+                return await self.list_models()
+            return self._models
+    
+    @staticmethod
+    def _match_model(model: str, available: List[str]) -> Optional[str]:
+        """Find model in available, treating a missing tag as ':latest'"""
+        if model in available:
+            return model
+        if ':' not in model and f"{model}:latest" in available:
+            return f"{model}:latest"
+        return None
+    
+    @staticmethod
+    async def _import_aiohttp():
+        """Import aiohttp off the event loop so background work never stalls a request"""
+        await asyncio.get_running_loop().run_in_executor(
+            None, importlib.import_module, "aiohttp"
+        )
+    
+    async def warm_up(self):
+        """Discover models in the background so the first request skips it"""
+        await self._import_aiohttp()
+        models = await self.available_models(refresh=True)
+        logger.info(f"Discovered {len(models)} vision models")
+    
+    async def resolve_model(self, model: Optional[str] = None) -> str:
+        """
+        Return the model a request for model will actually run on
+        
+        A missing model falls back to the first available vision model, so
+        callers that cache answers must key them on this name.
+        
+        Raises:
+            ValueError: If no vision models are available
+        """
+        if not model:
+            model = self.config.default_model
+            
+        # Check if model is available, refreshing once in case it was just pulled
+        available_models = await self.available_models()
+        if not self._match_model(model, available_models):
+            available_models = await self.available_models(refresh=True)
+        matched = self._match_model(model, available_models)
+        if matched:
+            return matched
+        # Try to find a suitable fallback
+        if available_models:
+            logger.warning(f"Model {model} not found, using {available_models[0]}")
+            return available_models[0]
+        raise ValueError("No vision models available. Please run 'ollama pull llava-phi3' first")
+    
     async def analyze_image(
         self, 
-        image_data: str, 
+        image_data: Union[str, bytes, memoryview], 
         prompt: str, 
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        output_format: Optional[Union[str, Dict[str, Any]]] = None
     ) -> str:
-        """Analyze an image using Ollama vision model"""
-        if not model:
-            model = self.config.default_model
-            
-        # Check if model is available
-        available_models = await self.list_models()
-        if model not in available_models:
-            # Try to find a suitable fallback
-            if available_models:
-                logger.warning(f"Model {model} not found, using {available_models[0]}")
-                model = available_models[0]
-            else:
-                raise ValueError("No vision models available. Please run 'ollama pull llava-phi3' first")
+        """
+        Analyze an image using Ollama vision model
+        
+        Args:
+            image_data: Base64 string, or compressed image bytes which are
+                base64-encoded while the request is streamed
+            output_format: "json" or a JSON schema to constrain the response to
+        """
+        model = await self.resolve_model(model)
         
         # Prepare the request
         payload = {
             "model": model,
             "prompt": prompt,
-            "images": [image_data],
-            "stream": False
+            "stream": False,
+            "keep_alive": self.config.keep_alive
         }
+        if options:
+            payload["options"] = options
+        if output_format:
+            payload["format"] = output_format
         
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("response", "No response from model")
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {response.status} - {error_text}")
+            session = await self._get_session()
+            length, body = generate_body(payload, [image_data])
+            async with self._generate_scheduler(), session.post(
+                f"{self.base_url}/api/generate",
+                data=body,
+                headers={
+                    "Content-Type": "application/json",
+                    "Content-Length": str(length)
+                }
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    self._record_request(model, result)
+                    return result.get("response", "No response from model")
+                else:
+                    error_text = await response.text()
+                    raise Exception(f"Ollama API error: {response.status} - {error_text}")
                         
         except asyncio.TimeoutError:
             raise Exception(f"Request timed out after {self.config.timeout} seconds")
@@ -95,32 +317,173 @@ class OllamaClient:
             logger.error(f"Error analyzing image: {e}")
             raise
     
+    async def embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """
+        Embed texts with an Ollama embedding model
+        
+        Args:
+            texts: Texts to embed in one request
+            model: Embedding model (defaults to embedding_model)
+            
+        Returns:
+            One embedding vector per text
+        """
+        payload = {
+            "model": model or self.config.embedding_model,
+            "input": texts,
+            "keep_alive": self.config.keep_alive
+        }
+        session = await self._get_session()
+        async with session.post(f"{self.base_url}/api/embed", json=payload) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Ollama embed error: {response.status} - {error_text}")
+            result = await response.json()
+        embeddings = result.get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise Exception(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} texts")
+        return embeddings
+    
+    def _record_request(self, model: str, result: Dict[str, Any]):
+        """Update timing stats from an Ollama generate response"""
+        # Ollama reports durations in nanoseconds
+        load_seconds = result.get("load_duration", 0) / 1e9
+        self._last_used[model] = time.monotonic()
+        self.stats["requests"] += 1
+        self.stats["request_seconds"] += result.get("total_duration", 0) / 1e9
+        self.stats["request_load_seconds"] += load_seconds
+        # A resident model reports a load time of a few milliseconds
+        if load_seconds > 1.0:
+            self.stats["cold_requests"] += 1
+            logger.warning(f"Request waited {load_seconds:.1f}s for {model} to load")
+    
+    async def preload_model(self, model: str, refresh: bool = False) -> Optional[float]:
+        """
+        Load a model into memory (or extend its residency) without generating
+        
+        Args:
+            model: Model to load
+            refresh: The model is resident and only its keep-alive timer is
+                reset, so no load time is counted
+        
+        Returns:
+            Seconds the request took, or None on failure
+        """
+        payload = {"model": model, "prompt": "", "keep_alive": self.config.keep_alive}
+        try:
+            session = await self._get_session()
+            # Ollama reports no durations for load-only requests, so time it here
+            started = time.perf_counter()
+            async with session.post(
+                f"{self.base_url}/api/generate",
+                json=payload
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.warning(f"Failed to preload {model}: {response.status} - {error_text}")
+                    return None
+                await response.read()
+            load_seconds = time.perf_counter() - started
+        except Exception as e:
+            logger.warning(f"Failed to preload {model}: {e}")
+            return None
+        
+        self._last_used[model] = time.monotonic()
+        if refresh:
+            self.stats["keep_alive_refreshes"] += 1
+            return load_seconds
+        self.stats["preloads"] += 1
+        self.stats["preload_seconds"] += load_seconds
+        logger.info(f"Preloaded {model} in {load_seconds:.1f}s")
+        return load_seconds
+    
+    def log_stats(self):
+        """Log where model load time was paid: ahead of time or inside requests"""
+        stats = self.stats
+        logger.info(
+            f"Model loads: {stats['preloads']} preloads took {stats['preload_seconds']:.1f}s, "
+            f"{stats['cold_requests']} of {stats['requests']} requests waited "
+            f"{stats['request_load_seconds']:.1f}s for a load, "
+            f"{stats['keep_alive_refreshes']} keep-alive refreshes"
+        )
+    
+    async def running_models(self) -> List[str]:
+        """List models currently resident in Ollama memory"""
+        try:
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/api/ps") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return [m.get("name", "") for m in data.get("models", [])]
+                return []
+        except Exception as e:
+            logger.error(f"Failed to list running models: {e}")
+            return []
+    
+    async def preload_models(self, models: List[str]):
+        """Preload the available models among the given preferences"""
+        await self._import_aiohttp()
+        available = await self.available_models()
+        matched = [self._match_model(m, available) for m in models]
+        wanted = [m for m in dict.fromkeys(matched) if m]
+        # Load the most preferred model last so it is the last one Ollama
+        # would evict if they do not all fit in memory
+        for model in reversed(wanted):
+            await self.preload_model(model)
+    
+    async def refresh_keep_alive(self, active_window: float) -> List[str]:
+        """
+        Extend residency of models used within the last active_window seconds
+        
+        Returns:
+            Models that had been unloaded and were loaded again
+        """
+        now = time.monotonic()
+        active = [m for m, t in self._last_used.items() if now - t <= active_window]
+        if not active:
+            return []
+        
+        resident = await self.running_models()
+        reloaded = []
+        for model in active:
+            if model not in resident:
+                reloaded.append(model)
+                logger.info(f"{model} is no longer resident, reloading")
+            # A preload of a resident model only resets its keep-alive timer
+            last_used = self._last_used[model]
+            await self.preload_model(model, refresh=model in resident)
+            self._last_used[model] = last_used
+        return reloaded
+    
     async def ensure_model(self, model: str) -> bool:
         """Ensure a model is available, attempt to pull if not"""
-        available_models = await self.list_models()
+        available_models = await self.available_models(refresh=True)
         if model in available_models:
             return True
             
         logger.info(f"Model {model} not found, attempting to pull...")
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/api/pull",
-                    json={"name": model}
-                ) as response:
-                    if response.status == 200:
-                        # Stream the response to show progress
-                        async for line in response.content:
-                            if line:
-                                try:
-                                    data = json.loads(line.decode())
-                                    status = data.get("status", "")
-                                    if status:
-                                        logger.info(f"Pull status: {status}")
-                                except:
-                                    pass
-                        return True
-                    return False
+            import aiohttp
+            session = await self._get_session()
+            # Pulls can take far longer than a generate request
+            async with session.post(
+                f"{self.base_url}/api/pull",
+                json={"name": model},
+                timeout=aiohttp.ClientTimeout(total=None)
+            ) as response:
+                if response.status == 200:
+                    # Stream the response to show progress
+                    async for line in response.content:
+                        if line:
+                            try:
+                                data = json.loads(line.decode())
+                                status = data.get("status", "")
+                                if status:
+                                    logger.info(f"Pull status: {status}")
+                            except:
+                                pass
+                    return True
+                return False
         except Exception as e:
             logger.error(f"Failed to pull model {model}: {e}")
             return False
@@ -0,0 +1,279 @@
+"""
+Persistent Result Store for Ollama Vision MCP
+Caches analysis results on disk so a fresh server process starts warm
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    image_digest TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    options TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    elapsed REAL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_results_accessed ON results(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_results_digest ON results(image_digest);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class ResultStore:
+    """
+    SQLite-backed cache of (image digest, prompt, model, options) -> response
+
+    The database runs in WAL mode so several server processes can read it
+    concurrently while one of them writes. Entries are evicted least recently
+    used first once the stored responses exceed ``max_bytes``.
+    """
+
+    # Fraction of max_bytes to shrink to when eviction kicks in, so we do not
+    # compact again on every subsequent insert
+    COMPACT_TARGET = 0.9
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, ttl: int = 0):
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def digest(image_data: Union[str, bytes, memoryview]) -> str:
+        """Return a stable digest for encoded image data"""
+        if isinstance(image_data, str):
+            image_data = image_data.encode('utf-8')
+        return hashlib.sha256(image_data).hexdigest()
+
+    @staticmethod
+    def make_key(
+        image_digest: str,
+        prompt: str,
+        model: str,
+        options: Optional[Dict[str, Any]] = None,
+        output_format: Optional[Union[str, Dict[str, Any]]] = None
+    ) -> str:
+        """Build the lookup key for a request"""
+        parts = [image_digest, prompt, model, options or {}]
+        # Free-text keys stay as they were before structured output existed
+        if output_format is not None:
+            parts.append(output_format)
+        material = json.dumps(
+            parts,
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path),
+                timeout=5.0,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            # auto_vacuum only takes effect before the first table is created
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            # Databases from before the running total was kept start from a full count
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (name, value) "
+                "SELECT 'total_size', COALESCE(SUM(size), 0) FROM results"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            now = time.time()
+            if self.ttl and now - created_at > self.ttl:
+                with self._transaction(conn):
+                    self._delete(conn, key)
+                return None
+
+            try:
+                conn.execute(
+                    "UPDATE results SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                    (now, key)
+                )
+            except sqlite3.OperationalError as e:
+                # Another process holds the write lock; the hit is still valid
+                logger.debug(f"Could not update access time for {key}: {e}")
+            return response
+
+    def put(
+        self,
+        key: str,
+        image_digest: str,
+        prompt: str,
+        model: str,
+        options: Optional[Dict[str, Any]],
+        response: str,
+        elapsed: Optional[float] = None
+    ):
+        """Store a response and evict old entries if over budget"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            conn = self._connect()
+            with self._transaction(conn):
+                self._delete(conn, key)
+                conn.execute(
+                    "INSERT INTO results "
+                    "(key, image_digest, model, prompt, options, response, size, "
+                    "elapsed, created_at, accessed_at, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (
+                        key, image_digest, model, prompt,
+                        json.dumps(options or {}, sort_keys=True),
+                        response, size, elapsed, now, now
+                    )
+                )
+                self._add_size(conn, size)
+            if self._total_size(conn) > self.max_bytes:
+                self._compact(conn)
+
+    def compact(self):
+        """Drop expired entries, evict down to budget and reclaim file space"""
+        with self._lock:
+            self._compact(self._connect())
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        # IMMEDIATE takes the write lock up front, so the running total and
+        # the rows it describes change together across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _delete(self, conn: sqlite3.Connection, key: str):
+        """Delete one entry and take its size off the running total"""
+        row = conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._add_size(conn, -row[0])
+
+    @staticmethod
+    def _add_size(conn: sqlite3.Connection, delta: int):
+        conn.execute(
+            "UPDATE meta SET value = value + ? WHERE name = 'total_size'", (delta,)
+        )
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        """Stored response bytes, from the running total rather than a table scan"""
+        return conn.execute(
+            "SELECT value FROM meta WHERE name = 'total_size'"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _sync_total_size(conn: sqlite3.Connection):
+        conn.execute(
+            "UPDATE meta SET value = (SELECT COALESCE(SUM(size), 0) FROM results) "
+            "WHERE name = 'total_size'"
+        )
+
+    def _compact(self, conn: sqlite3.Connection):
+        if self.ttl:
+            conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        # Compaction scans the table anyway, so re-sync the running total here
+        self._sync_total_size(conn)
+
+        target = int(self.max_bytes * self.COMPACT_TARGET)
+        total = self._total_size(conn)
+        if total > target:
+            # Walk entries oldest-access first and find the cut-off point
+            excess = total - target
+            cutoff = None
+            freed = 0
+            for accessed_at, size in conn.execute(
+                "SELECT accessed_at, size FROM results ORDER BY accessed_at"
+            ):
+                freed += size
+                cutoff = accessed_at
+                if freed >= excess:
+                    break
+            if cutoff is not None:
+                deleted = conn.execute(
+                    "DELETE FROM results WHERE accessed_at <= ?", (cutoff,)
+                ).rowcount
+                logger.info(f"Evicted {deleted} cached results ({freed} bytes)")
+                self._sync_total_size(conn)
+
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, stored bytes and total hits"""
+        with self._lock:
+            conn = self._connect()
+            entries, size, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) "
+                "FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": hits}
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async wrapper around get() that never raises"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, self.get, key)
+        except Exception as e:
+            logger.warning(f"Result store lookup failed: {e}")
+            return None
+
+    async def aput(self, *args: Any, **kwargs: Any):
+        """Async wrapper around put() that never raises"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, lambda: self.put(*args, **kwargs))
+        except Exception as e:
+            logger.warning(f"Result store write failed: {e}")
@@ -0,0 +1,152 @@
+"""
+Semantic Cache for Ollama Vision MCP
+Serves a stored answer when a new prompt about the same image means the same
+thing as an earlier one, judged by cosine similarity of prompt embeddings
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# NumPy is optional and only imported when the semantic cache is enabled
+
+logger = logging.getLogger(__name__)
+
+class _ScopeIndex:
+    """Normalized prompt embeddings and their answers for one image and request scope"""
+
+    def __init__(self, np):
+        self.np = np
+        self.vectors = None
+        self.prompts: List[str] = []
+        self.responses: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def best(self, vector) -> Tuple[float, int]:
+        """Return the highest cosine similarity and its row"""
+        scores = self.vectors @ vector
+        row = int(self.np.argmax(scores))
+        return float(scores[row]), row
+
+    def add(self, vector, prompt: str, response: str, max_prompts: int):
+        row = vector[None, :]
+        self.vectors = row if self.vectors is None else self.np.vstack([self.vectors, row])
+        self.prompts.append(prompt)
+        self.responses.append(response)
+        if len(self.responses) > max_prompts:
+            # Drop the oldest prompt for this image
+            self.vectors = self.vectors[1:]
+            del self.prompts[0]
+            del self.responses[0]
+
+class SemanticCache:
+    """
+    In-memory index of prompt embeddings per image digest
+
+    Entries are grouped by scope: the image digest plus everything else that
+    changes the answer (model, options, output format). Only prompts within the
+    same scope are compared, so a near-duplicate prompt can only ever return an
+    answer for the same image from the same model. The least recently used
+    scopes are evicted once more than max_entries prompts are stored.
+    """
+
+    # Prompts kept per scope; the oldest are dropped first
+    MAX_PROMPTS_PER_SCOPE = 32
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 2048):
+        """
+        Initialize the cache
+
+        Args:
+            threshold: Minimum cosine similarity for a prompt to count as a match
+            max_entries: Total prompts stored across all scopes
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        import numpy
+        self.np = numpy
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries = 0
+        self.stats = {"lookups": 0, "hits": 0}
+        self._scopes: "OrderedDict[str, _ScopeIndex]" = OrderedDict()
+
+    def _normalize(self, embedding: Sequence[float]):
+        vector = self.np.asarray(embedding, dtype=self.np.float32)
+        norm = float(self.np.linalg.norm(vector))
+        if not norm:
+            raise ValueError("Cannot index a zero embedding")
+        return vector / norm
+
+    def lookup(self, scope: str, embedding: Sequence[float]) -> Optional[Tuple[str, float]]:
+        """
+        Find an answer to a near-duplicate prompt in scope
+
+        Returns:
+            (stored response, similarity), or None if nothing is close enough
+        """
+        self.stats["lookups"] += 1
+        index = self._scopes.get(scope)
+        if index is None:
+            return None
+        vector = self._normalize(embedding)
+        if index.vectors.shape[1] != vector.shape[0]:
+            # The embedding model changed; these vectors are not comparable
+            self._drop(scope)
+            return None
+
+        score, row = index.best(vector)
+        if score < self.threshold:
+            return None
+        self._scopes.move_to_end(scope)
+        self.stats["hits"] += 1
+        logger.debug(f"Semantic cache hit ({score:.3f}) for '{index.prompts[row][:60]}'")
+        return index.responses[row], score
+
+    def add(self, scope: str, embedding: Sequence[float], prompt: str, response: str):
+        """Store the answer to a prompt, evicting old scopes to stay in bounds"""
+        vector = self._normalize(embedding)
+        index = self._scopes.get(scope)
+        if index is not None and index.vectors.shape[1] != vector.shape[0]:
+            self._drop(scope)
+            index = None
+        if index is None:
+            index = self._scopes[scope] = _ScopeIndex(self.np)
+
+        before = len(index)
+        index.add(vector, prompt, response, self.MAX_PROMPTS_PER_SCOPE)
+        self.entries += len(index) - before
+        self._scopes.move_to_end(scope)
+
+        while self.entries > self.max_entries and len(self._scopes) > 1:
+            self._drop(next(iter(self._scopes)))
+
+    def resize(self, threshold: float, max_entries: int):
+        """Change the match threshold and size bound"""
+        self.threshold = threshold
+        self.max_entries = max_entries
+        while self.entries > self.max_entries and self._scopes:
+            self._drop(next(iter(self._scopes)))
+
+    def clear(self):
+        self._scopes.clear()
+        self.entries = 0
+
+    def _drop(self, scope: str):
+        index = self._scopes.pop(scope, None)
+        if index is not None:
+            self.entries -= len(index)
+
+    def info(self) -> Dict[str, Any]:
+        """Return size and hit-rate counters"""
+        lookups = self.stats["lookups"]
+        return {
+            "scopes": len(self._scopes),
+            "entries": self.entries,
+            "lookups": lookups,
+            "hits": self.stats["hits"],
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
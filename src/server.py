@@ -4,12 +4,16 @@ Ollama Vision MCP Server
 A Model Context Protocol server providing computer vision capabilities using Ollama
 """
 
+import argparse
 import asyncio
 import base64
 import json
 import logging
 import os
 import sys
+import time
+import weakref
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Sequence
 from pathlib import Path
 
@@ -19,8 +23,10 @@ from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 
 from .ollama_client import OllamaClient
-from .image_handler import ImageHandler
+from .image_handler import ImageData, ImageHandler
 from .config import Config
+from .result_store import ResultStore
+from .structured import NAMED_SCHEMAS, OutputFormat, format_prompt, parse_response, resolve_format
 
 # Configure logging
 logging.basicConfig(
@@ -29,12 +35,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Prompt sent for each image tool; analyze_image's can be replaced per call
+TOOL_PROMPTS = {
+    "analyze_image": "Describe this image in detail",
+    "describe_image": "Provide a comprehensive description of this image, including all visible elements, colors, composition, and any notable details",
+    "identify_objects": "List all identifiable objects in this image. Format as a bulleted list",
+    "read_text": "Extract and transcribe all visible text in this image. If no text is visible, say 'No text found'",
+}
+
+# Prompts used instead when a structured answer is requested, so the prompt
+# does not ask for a format the schema rules out
+STRUCTURED_TOOL_PROMPTS = {
+    "identify_objects": "List all identifiable objects in this image",
+}
+
+# Per-call Ollama options, merged over the tool's generation profile
+OPTIONS_SCHEMA = {
+    "type": "object",
+    "description": (
+        "Optional Ollama generation options for this call, e.g. "
+        "num_predict, temperature, stop, num_ctx"
+    ),
+    "additionalProperties": True
+}
+
+# Optional structured output, forwarded to Ollama as "format"
+SCHEMA_SCHEMA = {
+    "type": ["object", "string"],
+    "description": (
+        "Optional JSON schema the answer must follow, 'json' for any JSON, or "
+        f"a built-in schema name ({', '.join(NAMED_SCHEMAS)}). The result is "
+        "returned as validated JSON text"
+    )
+}
+
+# Optional crop boxes, each analyzed on its own at native resolution
+REGIONS_SCHEMA = {
+    "type": "array",
+    "description": (
+        "Optional regions to analyze instead of the whole image. Each region is "
+        "cropped at full resolution and answered separately"
+    ),
+    "maxItems": ImageHandler.MAX_REGIONS,
+    "items": {
+        "type": "object",
+        "properties": {
+            "x": {"type": "number", "description": "Left edge"},
+            "y": {"type": "number", "description": "Top edge"},
+            "width": {"type": "number"},
+            "height": {"type": "number"},
+            "units": {
+                "type": "string",
+                "enum": ["pixels", "normalized"],
+                "description": "pixels (default) or fractions of the image size"
+            },
+            "label": {"type": "string", "description": "Optional name for the region"}
+        },
+        "required": ["x", "y", "width", "height"]
+    }
+}
+
+def image_tool(
+    name: str,
+    description: str,
+    properties: Optional[Dict[str, Any]] = None
+) -> types.Tool:
+    """Build a tool that takes an image_path plus the shared optional inputs"""
+    schema_properties = {
+        "image_path": {
+            "type": "string",
+            "description": "Path to image file or URL"
+        }
+    }
+    schema_properties.update(properties or {})
+    schema_properties["regions"] = REGIONS_SCHEMA
+    schema_properties["schema"] = SCHEMA_SCHEMA
+    schema_properties["options"] = OPTIONS_SCHEMA
+    return types.Tool(
+        name=name,
+        description=description,
+        inputSchema={
+            "type": "object",
+            "properties": schema_properties,
+            "required": ["image_path"]
+        }
+    )
+
 class OllamaVisionServer:
     def __init__(self):
         self.server = Server("ollama-vision-mcp")
         self.config = Config()
         self.ollama_client = OllamaClient(self.config)
-        self.image_handler = ImageHandler()
+        self.image_handler = ImageHandler(
+            memory_budget=self.config.memory_budget_bytes,
+            memory_wait_timeout=self.config.memory_wait_timeout,
+            region_cache_bytes=self.config.region_cache_bytes,
+            region_cache_ttl=self.config.region_cache_ttl
+        )
+        self.result_store = None
+        self.open_result_store()
+        self.semantic_cache = None
+        self._prompt_vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._embedding_retry_at = 0.0
+        self.open_semantic_cache()
+        self._background_tasks: List[asyncio.Task] = []
+        self._first_request: Optional[asyncio.Event] = None
+        self._config_watcher: Optional[asyncio.Task] = None
+        self._session_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
         
         # Register handlers
         self.setup_handlers()
@@ -43,72 +152,82 @@ class OllamaVisionServer:
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
             """List all available tools"""
+            self.request_served()
             return [
-                types.Tool(
+                image_tool(
                     name="analyze_image",
                     description="Analyze an image and provide detailed description with optional custom prompt",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "image_path": {
-                                "type": "string",
-                                "description": "Path to image file or URL"
-                            },
-                            "prompt": {
-                                "type": "string",
-                                "description": "Optional custom prompt for analysis"
-                            },
-                            "model": {
-                                "type": "string",
-                                "description": "Optional Ollama model to use"
-                            }
+                    properties={
+                        "prompt": {
+                            "type": "string",
+                            "description": "Optional custom prompt for analysis"
                         },
-                        "required": ["image_path"]
+                        "model": {
+                            "type": "string",
+                            "description": "Optional Ollama model to use"
+                        }
                     }
                 ),
-                types.Tool(
+                image_tool(
                     name="describe_image",
-                    description="Get a comprehensive description of what's in the image",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "image_path": {
-                                "type": "string",
-                                "description": "Path to image file or URL"
-                            }
-                        },
-                        "required": ["image_path"]
-                    }
+                    description="Get a comprehensive description of what's in the image"
                 ),
-                types.Tool(
+                image_tool(
                     name="identify_objects",
-                    description="List all identifiable objects in the image",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "image_path": {
-                                "type": "string",
-                                "description": "Path to image file or URL"
-                            }
-                        },
-                        "required": ["image_path"]
-                    }
+                    description="List all identifiable objects in the image"
                 ),
-                types.Tool(
+                image_tool(
                     name="read_text",
-                    description="Extract visible text from the image",
+                    description="Extract visible text from the image"
+                ),
+                types.Tool(
+                    name="scan_directory",
+                    description=(
+                        "Run an image tool over every image in a directory, writing "
+                        "one JSON line per image. Rerunning with the same output "
+                        "resumes where an interrupted scan stopped"
+                    ),
                     inputSchema={
                         "type": "object",
                         "properties": {
-                            "image_path": {
+                            "directory": {
+                                "type": "string",
+                                "description": "Directory to scan"
+                            },
+                            "output_path": {
+                                "type": "string",
+                                "description": (
+                                    "JSONL file to append results to, relative to "
+                                    "the server's scan_output_dir"
+                                )
+                            },
+                            "tool": {
+                                "type": "string",
+                                "enum": list(TOOL_PROMPTS),
+                                "description": "Tool to run on each image (default: describe_image)"
+                            },
+                            "prompt": {
+                                "type": "string",
+                                "description": "Optional custom prompt (analyze_image only)"
+                            },
+                            "pattern": {
                                 "type": "string",
-                                "description": "Path to image file or URL"
-                            }
+                                "description": "Optional file name pattern, e.g. '*.png'"
+                            },
+                            "recursive": {
+                                "type": "boolean",
+                                "description": "Include subdirectories (default: true)"
+                            },
+                            "limit": {
+                                "type": "integer",
+                                "description": "Optional maximum number of new images to analyze in this call"
+                            },
+                            "options": OPTIONS_SCHEMA
                         },
-                        "required": ["image_path"]
+                        "required": ["directory", "output_path"]
                     }
                 )
-            ]
+            ] + (self.admin_tools() if self.config.admin_tools else [])
         
         @self.server.call_tool()
         async def handle_call_tool(
@@ -116,65 +235,591 @@ class OllamaVisionServer:
             arguments: Optional[Dict[str, Any]] = None
         ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
             """Handle tool execution"""
+            self.request_served()
+            async with self.session_slots():
+                return await self.execute_tool(name, arguments)
+    
+    def admin_tools(self) -> List[types.Tool]:
+        """Tools for inspecting and tuning the configuration of a running server"""
+        return [
+            types.Tool(
+                name="get_config",
+                description="Show the server's current configuration",
+                inputSchema={"type": "object", "properties": {}}
+            ),
+            types.Tool(
+                name="set_config",
+                description=(
+                    "Change configuration settings on the running server. Invalid "
+                    "values are rejected and nothing is applied. A null value "
+                    "removes an earlier runtime change"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "settings": {
+                            "type": "object",
+                            "description": "Setting names and new values, e.g. {\"timeout\": 60}",
+                            "additionalProperties": True
+                        }
+                    },
+                    "required": ["settings"]
+                }
+            )
+        ]
+    
+    def session_slots(self) -> asyncio.Semaphore:
+        """Per-session limit on concurrent tool calls"""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            session = self
+        slots = self._session_slots.get(session)
+        if slots is None:
+            slots = asyncio.Semaphore(self.config.session_max_concurrent_requests)
+            self._session_slots[session] = slots
+        return slots
+    
+    async def execute_tool(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]] = None
+    ) -> Sequence[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+        """Run a tool and return its MCP content"""
+        try:
+            if name in ("get_config", "set_config") and self.config.admin_tools:
+                result = await self.configure(name, arguments or {})
+                return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+            
+            if not arguments:
+                raise ValueError("No arguments provided")
+            
+            if name == "scan_directory":
+                summary = await self.scan_directory(arguments)
+                return [types.TextContent(type="text", text=json.dumps(summary, indent=2))]
+            
+            if name not in TOOL_PROMPTS:
+                raise ValueError(f"Unknown tool: {name}")
+            
+            image_path = arguments.get("image_path")
+            if not image_path:
+                raise ValueError("image_path is required")
+            
+            # Only analyze_image takes a custom prompt and model
+            prompt = TOOL_PROMPTS[name]
+            model = None
+            if name == "analyze_image":
+                prompt = arguments.get("prompt", prompt)
+                model = arguments.get("model", self.config.default_model)
+            
+            output_format = resolve_format(arguments.get("schema"))
+            if output_format is not None and name != "analyze_image":
+                prompt = STRUCTURED_TOOL_PROMPTS.get(name, prompt)
+            # The semantic cache compares the question itself; the schema text
+            # format_prompt appends would dominate its embedding
+            question = prompt
+            prompt = format_prompt(prompt, output_format)
+            
+            # Process the image at the resolution this model and tool need
+            policy = self.config.resolution_policy(model, name)
+            options = self.config.generation_options(
+                name, arguments.get("options"), structured=output_format is not None
+            )
+            
+            regions = arguments.get("regions")
+            if regions:
+                return await self.analyze_regions(
+                    image_path, regions, prompt, model, options, policy, output_format, question
+                )
+            
+            image_data = await self.image_handler.load_image(image_path, policy)
+            result = await self.analyze(
+                image_data, prompt, model, options, output_format, question
+            )
+            return [types.TextContent(type="text", text=result)]
+            
+        except Exception as e:
+            logger.error(f"Error executing tool {name}: {e}")
+            error_msg = f"Error: {str(e)}"
+            return [types.TextContent(type="text", text=error_msg)]
+    
+    async def analyze_regions(
+        self,
+        image_path: str,
+        regions: List[Dict[str, Any]],
+        prompt: str,
+        model: Optional[str],
+        options: Dict[str, Any],
+        policy: Dict[str, Any],
+        output_format: Optional[OutputFormat] = None,
+        question: Optional[str] = None
+    ) -> List[types.TextContent]:
+        """
+        Analyze crops of one image concurrently
+        
+        Returns one text result per region, or with an output_format a single
+        JSON array of {"label", "result"} (or {"label", "error"}) objects
+        """
+        crops = await self.image_handler.load_regions(image_path, regions, policy)
+        results = await asyncio.gather(
+            *(self.analyze(crop, prompt, model, options, output_format, question)
+              for crop in crops),
+            return_exceptions=True
+        )
+        
+        records = []
+        for index, (region, result) in enumerate(zip(regions, results)):
+            label = region.get("label") or f"Region {index + 1}"
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing {label}: {result}")
+                records.append({"label": label, "error": str(result)})
+            elif output_format is not None:
+                # Structured results are JSON text already; nest them as values
+                records.append({"label": label, "result": json.loads(result)})
+            else:
+                records.append({"label": label, "result": result})
+        
+        if output_format is not None:
+            return [types.TextContent(type="text", text=json.dumps(records, ensure_ascii=False))]
+        return [
+            types.TextContent(
+                type="text",
+                text=f"{r['label']}:\n{r['result'] if 'result' in r else 'Error: ' + r['error']}"
+            )
+            for r in records
+        ]
+    
+    async def configure(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_config and set_config tools"""
+        if name == "set_config":
+            changed = self.config.update(arguments.get("settings"))
+            await self.apply_config(changed)
+            return {
+                "changed": changed,
+                "restart_required": [k for k in changed if k in Config.RESTART_SETTINGS]
+            }
+        result = {
+            "config_path": self.config.config_path,
+            "runtime_overrides": sorted(self.config.overrides),
+            "settings": self.config.settings(),
+            "ollama_stats": dict(self.ollama_client.stats)
+        }
+        if self.semantic_cache is not None:
+            result["semantic_cache"] = self.semantic_cache.info()
+        return result
+    
+    async def apply_config(self, changed: Dict[str, Any]):
+        """Push configuration changes into the running components"""
+        if not changed:
+            return
+        for key in changed:
+            if key in Config.RESTART_SETTINGS:
+                logger.warning(f"{key} changed; it takes effect after a restart")
+        self.ollama_client.apply_config(changed)
+        if "config_reload_interval" in changed and self._first_request is not None:
+            # _first_request exists once start_background_tasks has run; only
+            # servers that started their background tasks watch the file
+            self.start_config_watcher()
+        if {"memory_budget_bytes", "memory_wait_timeout"} & changed.keys():
+            await self.image_handler.memory.resize(
+                self.config.memory_budget_bytes, self.config.memory_wait_timeout
+            )
+        if {"region_cache_bytes", "region_cache_ttl"} & changed.keys():
+            self.image_handler.decoded.resize(
+                self.config.region_cache_bytes, self.config.region_cache_ttl
+            )
+        if {"cache_enabled", "cache_path", "cache_max_bytes", "cache_ttl"} & changed.keys():
+            self.open_result_store()
+        if "embedding_model" in changed:
+            # Vectors from different models are not comparable
+            self._prompt_vectors.clear()
+            self._embedding_retry_at = 0.0
+            if self.semantic_cache is not None:
+                self.semantic_cache.clear()
+        if {"semantic_cache_enabled", "semantic_cache_threshold",
+                "semantic_cache_max_entries"} & changed.keys():
+            self.open_semantic_cache()
+        if "session_max_concurrent_requests" in changed:
+            # Calls already running keep their slot; new calls use the new limit
+            self._session_slots.clear()
+    
+    def open_result_store(self):
+        """Open, resize or close the result store to match the configuration"""
+        store = self.result_store
+        if store is not None and (not self.config.cache_enabled
+                                  or store.path != Path(self.config.cache_path).expanduser()):
+            store.close()
+            store = self.result_store = None
+        if not self.config.cache_enabled:
+            return
+        if store is None:
+            self.result_store = ResultStore(
+                self.config.cache_path,
+                max_bytes=self.config.cache_max_bytes,
+                ttl=self.config.cache_ttl
+            )
+        else:
+            store.max_bytes = self.config.cache_max_bytes
+            store.ttl = self.config.cache_ttl
+    
+    def open_semantic_cache(self):
+        """Create, resize or drop the semantic cache to match the configuration"""
+        if not self.config.semantic_cache_enabled:
+            self.semantic_cache = None
+            return
+        if self.semantic_cache is not None:
+            self.semantic_cache.resize(
+                self.config.semantic_cache_threshold,
+                self.config.semantic_cache_max_entries
+            )
+            return
+        try:
+            from .semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache(
+                threshold=self.config.semantic_cache_threshold,
+                max_entries=self.config.semantic_cache_max_entries
+            )
+        except ImportError:
+            logger.warning("The semantic cache needs NumPy; install it with: pip install numpy")
+    
+    async def watch_config(self):
+        """
+        Apply edits to the config file without restarting the server
+        
+        Stops once config_reload_interval is set to 0; apply_config starts
+        it again when the interval is raised.
+        """
+        while self.config.config_reload_interval > 0:
+            await asyncio.sleep(self.config.config_reload_interval)
+            if not self.config.file_changed():
+                continue
             try:
-                if not arguments:
-                    raise ValueError("No arguments provided")
-                
-                image_path = arguments.get("image_path")
-                if not image_path:
-                    raise ValueError("image_path is required")
-                
-                # Process the image
-                image_data = await self.image_handler.process_image(image_path)
-                
-                # Call the appropriate tool
-                if name == "analyze_image":
-                    prompt = arguments.get("prompt", "Describe this image in detail")
-                    model = arguments.get("model", self.config.default_model)
-                    result = await self.ollama_client.analyze_image(image_data, prompt, model)
-                    
-                elif name == "describe_image":
-                    prompt = "Provide a comprehensive description of this image, including all visible elements, colors, composition, and any notable details"
-                    result = await self.ollama_client.analyze_image(image_data, prompt)
-                    
-                elif name == "identify_objects":
-                    prompt = "List all identifiable objects in this image. Format as a bulleted list"
-                    result = await self.ollama_client.analyze_image(image_data, prompt)
-                    
-                elif name == "read_text":
-                    prompt = "Extract and transcribe all visible text in this image. If no text is visible, say 'No text found'"
-                    result = await self.ollama_client.analyze_image(image_data, prompt)
-                    
-                else:
-                    raise ValueError(f"Unknown tool: {name}")
-                
-                return [types.TextContent(type="text", text=result)]
-                
+                changed = self.config.reload()
+            except ValueError as e:
+                logger.error(f"Rejected config change, keeping the current config: {e}")
+                continue
+            await self.apply_config(changed)
+    
+    async def scan_directory(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the scan_directory tool"""
+        from .batch import DirectoryScanner
+        
+        directory = arguments.get("directory")
+        output_path = arguments.get("output_path")
+        if not directory or not output_path:
+            raise ValueError("directory and output_path are required")
+        output_path = self.scan_output_path(output_path)
+        
+        tool = arguments.get("tool", "describe_image")
+        scanner = DirectoryScanner(
+            self,
+            tool=tool,
+            prompt=arguments.get("prompt") if tool == "analyze_image" else None,
+            options=arguments.get("options")
+        )
+        return await scanner.scan(
+            directory,
+            output_path,
+            pattern=arguments.get("pattern", "*"),
+            recursive=arguments.get("recursive", True),
+            limit=arguments.get("limit")
+        )
+    
+    def scan_output_path(self, output_path: str) -> str:
+        """
+        Resolve a scan_directory output path inside scan_output_dir
+        
+        Clients only choose a name under that directory, so the tool cannot
+        append to arbitrary files on the server.
+        
+        Raises:
+            ValueError: If the path resolves outside scan_output_dir
+        """
+        root = Path(self.config.scan_output_dir).expanduser().resolve()
+        path = (root / output_path).resolve()
+        if root not in path.parents:
+            raise ValueError(f"output_path must be inside scan_output_dir ({root})")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+    
+    async def analyze(
+        self,
+        image_data: ImageData,
+        prompt: str,
+        model: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        output_format: Optional[OutputFormat] = None,
+        question: Optional[str] = None
+    ) -> str:
+        """
+        Analyze an image, serving repeated requests from the result store
+        and reworded ones from the semantic cache
+        
+        With an output_format the response is validated and returned as JSON
+        text; responses that fail validation raise and are not cached.
+        
+        Args:
+            question: The caller's prompt before format instructions were
+                added, embedded for the semantic cache (default: prompt)
+        """
+        model = model or self.config.default_model
+        if self.result_store is None and self.semantic_cache is None:
+            return await self.generate(image_data, prompt, model, options, output_format)
+        
+        # Key on the model that will run: a missing model falls back to
+        # another, whose answers must not be served once it is pulled
+        model = await self.ollama_client.resolve_model(model)
+        digest = ResultStore.digest(image_data)
+        if self.result_store is not None:
+            key = ResultStore.make_key(digest, prompt, model, options, output_format)
+            cached = await self.result_store.aget(key)
+            if cached is not None:
+                logger.debug(f"Result store hit for {digest[:12]}")
+                return cached
+        
+        # Reworded prompts about the same image, model, options and format
+        embedding = None
+        if self.semantic_cache is not None:
+            scope = ResultStore.make_key(digest, "", model, options, output_format)
+            question = question or prompt
+            embedding = await self.prompt_embedding(question)
+            if embedding is not None:
+                hit = self.semantic_cache.lookup(scope, embedding)
+                if hit is not None:
+                    return hit[0]
+        
+        started = time.monotonic()
+        result = await self.generate(image_data, prompt, model, options, output_format)
+        if self.result_store is not None:
+            await self.result_store.aput(
+                key, digest, prompt, model, options, result,
+                elapsed=time.monotonic() - started
+            )
+        if embedding is not None and self.semantic_cache is not None:
+            self.semantic_cache.add(scope, embedding, question, result)
+        return result
+    
+    # Recent prompt embeddings kept so repeated prompts skip the embed call
+    PROMPT_VECTOR_CACHE_SIZE = 1024
+    
+    # Seconds to skip the semantic cache after the embedding model fails
+    EMBEDDING_RETRY_DELAY = 60.0
+    
+    async def prompt_embedding(self, prompt: str) -> Optional[List[float]]:
+        """Embed a prompt for the semantic cache, or None if embedding fails"""
+        key = f"{self.config.embedding_model}\n{prompt}"
+        vector = self._prompt_vectors.get(key)
+        if vector is not None:
+            self._prompt_vectors.move_to_end(key)
+            return vector
+        if time.monotonic() < self._embedding_retry_at:
+            return None
+        
+        try:
+            vector = (await self.ollama_client.embed([prompt]))[0]
+        except Exception as e:
+            logger.warning(
+                f"Embedding with {self.config.embedding_model} failed, skipping the "
+                f"semantic cache for {self.EMBEDDING_RETRY_DELAY:.0f}s: {e}"
+            )
+            self._embedding_retry_at = time.monotonic() + self.EMBEDDING_RETRY_DELAY
+            return None
+        
+        self._prompt_vectors[key] = vector
+        if len(self._prompt_vectors) > self.PROMPT_VECTOR_CACHE_SIZE:
+            self._prompt_vectors.popitem(last=False)
+        return vector
+    
+    async def generate(
+        self,
+        image_data: ImageData,
+        prompt: str,
+        model: str,
+        options: Optional[Dict[str, Any]],
+        output_format: Optional[OutputFormat]
+    ) -> str:
+        """Run one generation, validating structured responses"""
+        result = await self.ollama_client.analyze_image(
+            image_data, prompt, model, options, output_format
+        )
+        if output_format is None:
+            return result
+        return json.dumps(parse_response(result, output_format), ensure_ascii=False)
+    
+    # Seconds to wait for the first client request before warming up anyway
+    WARM_UP_DELAY = 5.0
+    
+    # Seconds given to the first response to be written before warm-up starts
+    WARM_UP_GRACE = 0.25
+    
+    def start_background_tasks(self):
+        """Start warm-up work that must not delay the MCP handshake"""
+        self._first_request = asyncio.Event()
+        self._background_tasks.append(
+            asyncio.create_task(self.after_first_request(self.ollama_client.warm_up))
+        )
+        if self.config.preload_models:
+            self._background_tasks.append(
+                asyncio.create_task(self.after_first_request(self.keep_models_warm))
+            )
+        self.start_config_watcher()
+    
+    def start_config_watcher(self):
+        """Watch the config file unless that is disabled or already running"""
+        if not self.config.config_path or self.config.config_reload_interval <= 0:
+            return
+        if self._config_watcher is not None and not self._config_watcher.done():
+            return
+        self._config_watcher = asyncio.create_task(self.watch_config())
+        self._background_tasks.append(self._config_watcher)
+    
+    def request_served(self):
+        """Note that the client got through the handshake and sent a request"""
+        if self._first_request is not None:
+            self._first_request.set()
+    
+    async def after_first_request(self, work):
+        """
+        Run background work once the client has been served
+        
+        Warm-up imports aiohttp and talks to Ollama; starting it while the
+        client is still waiting for initialize or tools/list would delay them.
+        """
+        try:
+            await asyncio.wait_for(self._first_request.wait(), self.WARM_UP_DELAY)
+            await asyncio.sleep(self.WARM_UP_GRACE)
+        except asyncio.TimeoutError:
+            pass
+        await work()
+    
+    async def keep_models_warm(self):
+        """Preload preferred models, then keep actively used ones resident"""
+        preferred = [self.config.default_model] + list(self.config.model_preferences)
+        await self.ollama_client.preload_models(preferred)
+        
+        while True:
+            await asyncio.sleep(self.config.keep_alive_interval)
+            try:
+                await self.ollama_client.refresh_keep_alive(
+                    self.config.keep_alive_active_window
+                )
             except Exception as e:
-                logger.error(f"Error executing tool {name}: {e}")
-                error_msg = f"Error: {str(e)}"
-                return [types.TextContent(type="text", text=error_msg)]
+                logger.warning(f"Keep-alive refresh failed: {e}")
+            self.ollama_client.log_stats()
+    
+    async def stop_background_tasks(self):
+        """Cancel background tasks and wait for them to finish"""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks.clear()
+    
+    def initialization_options(self) -> InitializationOptions:
+        """Options sent to every client during the MCP handshake"""
+        return InitializationOptions(
+            server_name="ollama-vision-mcp",
+            server_version="1.0.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={},
+            )
+        )
     
     async def run(self):
-        """Run the MCP server"""
-        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="ollama-vision-mcp",
-                    server_version="1.0.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities={},
+        """Run the MCP server on the configured transport"""
+        self.start_background_tasks()
+        try:
+            if self.config.transport == "http":
+                from .http_transport import run_http
+                await run_http(self, self.config.http_host, self.config.http_port)
+            else:
+                async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+                    await self.server.run(
+                        read_stream,
+                        write_stream,
+                        self.initialization_options()
                     )
-                )
+        finally:
+            await self.close()
+    
+    async def run_scan(self, args: argparse.Namespace) -> Dict[str, Any]:
+        """Run the scan subcommand"""
+        from .batch import DirectoryScanner
+        
+        self.config.update({
+            f"scan_{stage}_workers": getattr(args, f"{stage}_workers")
+            for stage in ("read", "preprocess", "generate")
+        })
+        try:
+            scanner = DirectoryScanner(
+                self, tool=args.tool, prompt=args.prompt, model=args.model
+            )
+            return await scanner.scan(
+                args.directory,
+                args.output,
+                checkpoint_path=args.checkpoint,
+                pattern=args.pattern,
+                recursive=args.recursive,
+                limit=args.limit
             )
+        finally:
+            await self.close()
+    
+    async def close(self):
+        """Release background tasks, connections and the result store"""
+        await self.stop_background_tasks()
+        if self.ollama_client.stats["requests"] or self.ollama_client.stats["preloads"]:
+            self.ollama_client.log_stats()
+        await self.ollama_client.close()
+        if self.result_store is not None:
+            self.result_store.close()
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments; each overrides the matching config value"""
+    parser = argparse.ArgumentParser(
+        prog="ollama-vision-mcp",
+        description="Model Context Protocol server for computer vision using Ollama"
+    )
+    parser.add_argument("--transport", choices=["stdio", "http"],
+                        help="Serve one client over stdio or many over HTTP/SSE")
+    parser.add_argument("--host", help="Host to bind in http mode")
+    parser.add_argument("--port", type=int, help="Port to bind in http mode")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    scan = subparsers.add_parser(
+        "scan",
+        help="Analyze every image in a directory and write results as JSONL"
+    )
+    scan.add_argument("directory", help="Directory to scan")
+    scan.add_argument("-o", "--output", required=True, help="JSONL file to append results to")
+    scan.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)")
+    scan.add_argument("--tool", choices=list(TOOL_PROMPTS), default="describe_image")
+    scan.add_argument("--prompt", help="Custom prompt for analyze_image")
+    scan.add_argument("--model", help="Ollama model to use")
+    scan.add_argument("--pattern", default="*", help="File name pattern, e.g. '*.png'")
+    scan.add_argument("--no-recursive", dest="recursive", action="store_false",
+                      help="Do not descend into subdirectories")
+    scan.add_argument("--limit", type=int, help="Stop after this many new images")
+    scan.add_argument("--read-workers", type=int)
+    scan.add_argument("--preprocess-workers", type=int)
+    scan.add_argument("--generate-workers", type=int)
+    return parser.parse_args(argv)
 
 def main():
     """Main entry point"""
+    args = parse_args()
     try:
         server = OllamaVisionServer()
+        if args.command == "scan":
+            summary = asyncio.run(server.run_scan(args))
+            print(json.dumps(summary, indent=2))
+            return
+        # Applied as runtime overrides so config file reloads do not undo them
+        server.config.update({
+            "transport": args.transport,
+            "http_host": args.host,
+            "http_port": args.port
+        })
         asyncio.run(server.run())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
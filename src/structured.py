@@ -0,0 +1,169 @@
+"""
+Structured Output for Ollama Vision MCP
+Resolves the schema a tool call asks for, forwards it as Ollama's "format"
+and validates the model's JSON answer against it
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Compact default for identify_objects: short keys and a rough bounding box in
+# percent of the image size keep the constrained output to a few tokens per
+# object, and the object cap keeps the whole answer inside the "structured"
+# generation profile's num_predict, so it is never cut off mid-JSON
+OBJECTS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "objects": {
+            "type": "array",
+            "maxItems": 24,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "label": {"type": "string"},
+                    "count": {"type": "integer", "minimum": 1},
+                    "bbox": {
+                        "type": "array",
+                        "description": "[left, top, right, bottom] in percent of the image size",
+                        "items": {"type": "integer", "minimum": 0, "maximum": 100},
+                        "minItems": 4,
+                        "maxItems": 4
+                    }
+                },
+                "required": ["label", "count"]
+            }
+        }
+    },
+    "required": ["objects"]
+}
+
+# Schemas that can be requested by name instead of spelled out
+NAMED_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "objects": OBJECTS_SCHEMA,
+}
+
+OutputFormat = Union[str, Dict[str, Any]]
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+def resolve_format(value: Any) -> Optional[OutputFormat]:
+    """
+    Turn a tool's schema argument into an Ollama format value
+
+    Args:
+        value: None, "json" for any JSON, a name from NAMED_SCHEMAS, or a
+            JSON schema object
+
+    Returns:
+        "json", a schema dict, or None for free text
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if value == "json":
+            return value
+        if value in NAMED_SCHEMAS:
+            return NAMED_SCHEMAS[value]
+        raise ValueError(
+            f"Unknown schema: {value}. Use 'json', one of {sorted(NAMED_SCHEMAS)} "
+            f"or a JSON schema object"
+        )
+    if isinstance(value, dict):
+        return value
+    raise ValueError("schema must be a string or a JSON schema object")
+
+def format_prompt(prompt: str, output_format: Optional[OutputFormat]) -> str:
+    """Ask for JSON in the prompt too, which keeps constrained output on topic"""
+    if output_format is None:
+        return prompt
+    if output_format == "json":
+        return f"{prompt}. Respond in JSON."
+    schema = json.dumps(output_format, separators=(',', ':'))
+    return f"{prompt}. Respond in JSON matching this schema: {schema}"
+
+def _matches_type(instance: Any, expected: str) -> bool:
+    if expected == "integer":
+        return isinstance(instance, int) and not isinstance(instance, bool)
+    if expected == "number":
+        return isinstance(instance, (int, float)) and not isinstance(instance, bool)
+    python_type = _TYPES.get(expected)
+    # Unknown type names are not ours to reject
+    return python_type is None or isinstance(instance, python_type)
+
+def validate(instance: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Check instance against the common subset of JSON schema
+
+    Supports type, enum, properties, required, additionalProperties (false),
+    items, minItems, maxItems, minimum and maximum. Other keywords are ignored.
+
+    Returns:
+        A list of problems, empty when the instance is valid
+    """
+    errors: List[str] = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_matches_type(instance, t) for t in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(instance).__name__}"]
+
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: {instance!r} is not one of {schema['enum']}")
+
+    if isinstance(instance, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in instance:
+                errors.append(f"{path}: missing required property '{key}'")
+        for key, value in instance.items():
+            if key in properties:
+                errors.extend(validate(value, properties[key], f"{path}.{key}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}: unexpected property '{key}'")
+
+    if isinstance(instance, list):
+        if "minItems" in schema and len(instance) < schema["minItems"]:
+            errors.append(f"{path}: expected at least {schema['minItems']} items")
+        if "maxItems" in schema and len(instance) > schema["maxItems"]:
+            errors.append(f"{path}: expected at most {schema['maxItems']} items")
+        items = schema.get("items")
+        if isinstance(items, dict):
+            for index, item in enumerate(instance):
+                errors.extend(validate(item, items, f"{path}[{index}]"))
+
+    if _matches_type(instance, "number"):
+        if "minimum" in schema and instance < schema["minimum"]:
+            errors.append(f"{path}: {instance} is below the minimum {schema['minimum']}")
+        if "maximum" in schema and instance > schema["maximum"]:
+            errors.append(f"{path}: {instance} is above the maximum {schema['maximum']}")
+
+    return errors
+
+def parse_response(text: str, output_format: OutputFormat) -> Any:
+    """
+    Parse and validate a structured model response
+
+    Raises:
+        ValueError: If the response is not JSON or does not match the schema
+    """
+    try:
+        result = json.loads(text)
+    except ValueError as e:
+        # Usually the output hit num_predict before the JSON was closed
+        raise ValueError(f"Model response is not valid JSON ({e}): {text[:200]}")
+
+    if isinstance(output_format, dict):
+        errors = validate(result, output_format)
+        if errors:
+            raise ValueError(f"Model response does not match the schema: {'; '.join(errors[:5])}")
+    return result
@@ -0,0 +1,95 @@
+"""
+Tests for directory scanning helpers
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.batch import Checkpoint, iter_images
+
+def test_iter_images_filters_and_recurses(tmp_path):
+    """Only supported images matching the pattern are yielded"""
+    (tmp_path / "nested").mkdir()
+    for name in ["a.jpg", "b.PNG", "notes.txt", "nested/c.jpg", "nested/d.webp"]:
+        (tmp_path / name).write_bytes(b"")
+
+    found = {Path(p).relative_to(tmp_path).as_posix() for p in iter_images(str(tmp_path))}
+    assert found == {"a.jpg", "b.PNG", "nested/c.jpg", "nested/d.webp"}
+
+    flat = {Path(p).name for p in iter_images(str(tmp_path), "*.jpg", recursive=False)}
+    assert flat == {"a.jpg"}
+
+def test_checkpoint_resumes_and_ignores_torn_line(tmp_path):
+    """Completed paths survive a restart, even after a partial write"""
+    path = tmp_path / "scan.checkpoint"
+    checkpoint = Checkpoint(str(path))
+    checkpoint.add("/images/one.jpg")
+    checkpoint.close()
+    with open(path, "a") as f:
+        f.write('"/images/tw')
+
+    resumed = Checkpoint(str(path))
+    assert "/images/one.jpg" in resumed
+    assert "/images/two.jpg" not in resumed
+    resumed.close()
+
+def test_scan_directory_output_stays_in_scan_output_dir(tmp_path):
+    """Tool outputs are confined to scan_output_dir"""
+    from src.server import OllamaVisionServer
+
+    server = OllamaVisionServer()
+    server.config.update({"scan_output_dir": str(tmp_path / "scans")})
+
+    resolved = Path(server.scan_output_path("run/pictures.jsonl"))
+    assert resolved == (tmp_path / "scans" / "run" / "pictures.jsonl").resolve()
+    assert resolved.parent.is_dir()
+    for escaping in ["../outside.jsonl", str(tmp_path / "outside.jsonl"), "."]:
+        with pytest.raises(ValueError):
+            server.scan_output_path(escaping)
+
+def test_scan_reserves_memory_before_reading(tmp_path):
+    """Reads wait on the memory budget and every reservation is returned"""
+    from PIL import Image
+    from src.batch import DirectoryScanner
+    from src.server import OllamaVisionServer
+
+    # Identical files, so every image has the same estimated cost
+    for i in range(3):
+        Image.new("RGB", (640, 480), (200, 0, 0)).save(tmp_path / f"{i}.jpg")
+
+    async def run():
+        server = OllamaVisionServer()
+        handler = server.image_handler
+        reads = []
+        read_local_image = handler.read_local_image
+
+        async def tracked_read(path):
+            reads.append(handler.memory.in_use)
+            return await read_local_image(path)
+
+        async def fake_analyze(image_data, prompt, model=None, options=None):
+            return "ok"
+
+        handler.read_local_image = tracked_read
+        server.analyze = fake_analyze
+        scanner = DirectoryScanner(server)
+        cost = handler.estimate_file_cost(str(tmp_path / "0.jpg"), scanner.policy)
+
+        # Too small for any image: nothing is read
+        await handler.memory.resize(cost - 1, 1)
+        summary = await scanner.scan(str(tmp_path), str(tmp_path / "small.jsonl"))
+        assert (summary["failed"], reads, handler.memory.in_use) == (3, [], 0)
+
+        await handler.memory.resize(cost, 5)
+        summary = await DirectoryScanner(server).scan(str(tmp_path), str(tmp_path / "ok.jsonl"))
+        assert summary["succeeded"] == 3
+        # Each read happened under its own reservation, one image at a time
+        assert reads == [cost] * 3 and handler.memory.in_use == 0
+
+    asyncio.run(run())
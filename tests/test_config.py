@@ -0,0 +1,115 @@
+"""
+Tests for configuration loading
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import Config
+
+def test_generation_profiles_merge_over_defaults(tmp_path):
+    """A config file only overrides the profile settings it names"""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({
+        "generation_profiles": {"read_text": {"num_predict": 2048}}
+    }))
+    config = Config(str(config_path))
+
+    assert config.generation_options("read_text") == {
+        **Config.DEFAULT_GENERATION_PROFILES["read_text"],
+        "num_predict": 2048
+    }
+    assert (config.generation_options("identify_objects") ==
+            Config.DEFAULT_GENERATION_PROFILES["identify_objects"])
+
+def test_generation_options_call_overrides(tmp_path):
+    """Per-call options override the profile and None removes a setting"""
+    config = Config(str(tmp_path / "missing.json"))
+    options = config.generation_options(
+        "identify_objects", {"temperature": None, "stop": ["\n\n"]}
+    )
+    assert "temperature" not in options
+    assert options["stop"] == ["\n\n"]
+
+def test_reload_applies_valid_changes_and_keeps_last_good(tmp_path):
+    """File edits are applied as a whole, and an invalid edit changes nothing"""
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"timeout": 120, "max_connections": 32}))
+    config = Config(str(config_path))
+
+    config_path.write_text(json.dumps({"timeout": 60, "max_connections": 16}))
+    assert config.reload() == {"timeout": 60, "max_connections": 16}
+
+    for invalid in ('{"timeout": 30, "max_connections": 0}', '{"timeout": 30,'):
+        config_path.write_text(invalid)
+        try:
+            config.reload()
+            raise AssertionError(f"accepted {invalid}")
+        except ValueError:
+            pass
+        assert (config.timeout, config.max_connections) == (60, 16)
+
+    # Runtime overrides win over the file until they are removed
+    assert config.update({"timeout": 5}) == {"timeout": 5}
+    config_path.write_text(json.dumps({"timeout": 90}))
+    assert config.reload() == {"max_connections": 32}
+    assert config.update({"timeout": None}) == {"timeout": 90}
+
+def test_update_rejects_invalid_profiles_and_policies(tmp_path):
+    """Nested values are validated before a change is applied"""
+    config = Config(str(tmp_path / "missing.json"))
+    invalid = [
+        {"resolution_policies": {"default": {"max_dimension": "big"}}},
+        {"resolution_policies": {"models": {"llava": {"max_pixels": 0}}}},
+        {"resolution_policies": {"tools": {"read_text": {"quality": 101}}}},
+        {"resolution_policies": {"default": {"format": "gif"}}},
+        {"resolution_policies": {"tools": "read_text"}},
+        {"generation_profiles": {"read_text": [2048]}},
+        {"generation_profiles": {"read_text": {"num_predict": "lots"}}},
+        {"generation_profiles": {"describe_image": {"temperature": "warm"}}},
+    ]
+    for settings in invalid:
+        try:
+            config.update(settings)
+            raise AssertionError(f"accepted {settings}")
+        except ValueError:
+            pass
+    assert config.resolution_policy(None, None)["max_dimension"] == 672
+
+    changed = config.update({"resolution_policies": {"default": {"format": "PNG", "quality": 80}}})
+    assert list(changed) == ["resolution_policies"]
+    assert config.resolution_policy("llava", "analyze_image")["format"] == "PNG"
+
+def test_config_watcher_stops_and_restarts_with_the_interval(tmp_path, monkeypatch):
+    """Setting config_reload_interval to 0 stops watching; raising it resumes"""
+    import asyncio
+    from src.server import OllamaVisionServer
+
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"config_reload_interval": 0.05}))
+    monkeypatch.setenv("OLLAMA_VISION_CONFIG", str(config_path))
+
+    async def run():
+        server = OllamaVisionServer()
+        server.start_background_tasks()
+        try:
+            watcher = server._config_watcher
+            await server.apply_config(server.config.update({"config_reload_interval": 0}))
+            await asyncio.wait_for(watcher, 1)
+
+            await server.apply_config(server.config.update({"config_reload_interval": 0.05}))
+            assert not server._config_watcher.done()
+            config_path.write_text(json.dumps({"config_reload_interval": 0.05, "timeout": 7}))
+            for _ in range(40):
+                if server.config.timeout == 7:
+                    break
+                await asyncio.sleep(0.05)
+            assert server.config.timeout == 7
+        finally:
+            await server.close()
+
+    asyncio.run(run())
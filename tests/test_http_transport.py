@@ -0,0 +1,101 @@
+"""
+Tests for the HTTP transport's session limits
+"""
+
+import asyncio
+import base64
+import io
+import socket
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# HTTP mode is an optional extra
+pytest.importorskip("uvicorn")
+pytest.importorskip("mcp.server.streamable_http_manager")
+
+def png(shade: int) -> str:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (shade, 0, 0)).save(buffer, "PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+def test_max_sessions_covers_both_transports():
+    """Sessions on either transport count against max_sessions; extras get a 503"""
+    import aiohttp
+    import uvicorn
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+    from mcp.client.streamable_http import streamablehttp_client
+    from benchmarks.stub_ollama import StubOllama
+    from src.http_transport import build_app
+    from src.server import OllamaVisionServer
+
+    async def run():
+        stub = StubOllama(latency=0.3)
+        server = OllamaVisionServer()
+        await server.apply_config(server.config.update({
+            "ollama_url": await stub.start(port=0),
+            "max_sessions": 2,
+            "session_max_concurrent_requests": 1,
+        }))
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        base = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        http = uvicorn.Server(uvicorn.Config(build_app(server), log_level="warning"))
+        serving = asyncio.ensure_future(http.serve(sockets=[sock]))
+        while not http.started:
+            await asyncio.sleep(0.05)
+
+        initialize = {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "1.0"}
+            }
+        }
+        try:
+            async with streamablehttp_client(f"{base}/mcp") as (read, write, _), \
+                    ClientSession(read, write) as streamable, \
+                    sse_client(f"{base}/sse") as (sse_read, sse_write), \
+                    ClientSession(sse_read, sse_write) as sse:
+                await streamable.initialize()
+                await sse.initialize()
+
+                # Both slots are taken, so a third session is turned away on
+                # either transport
+                async with aiohttp.ClientSession() as client:
+                    async with client.post(
+                        f"{base}/mcp", json=initialize,
+                        headers={"Accept": "application/json, text/event-stream"}
+                    ) as response:
+                        assert response.status == 503
+                        assert response.headers["Retry-After"] == "1"
+                    async with client.get(f"{base}/sse") as response:
+                        assert response.status == 503
+                        assert response.headers["Retry-After"] == "1"
+
+                # One call at a time per session: two calls in one session run
+                # back to back, while the other session is not held up
+                started = time.perf_counter()
+                results = await asyncio.gather(
+                    streamable.call_tool("describe_image", {"image_path": png(1)}),
+                    streamable.call_tool("describe_image", {"image_path": png(2)}),
+                    sse.call_tool("describe_image", {"image_path": png(3)}),
+                )
+                assert time.perf_counter() - started >= 0.6
+                assert all(r.content[0].text.startswith("stub response") for r in results)
+                assert len(server._session_slots) == 2
+        finally:
+            http.should_exit = True
+            await serving
+            await server.close()
+            await stub.stop()
+
+    asyncio.run(run())
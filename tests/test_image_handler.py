@@ -0,0 +1,98 @@
+"""
+Tests for image preprocessing
+"""
+
+import asyncio
+import base64
+import io
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from src.config import Config
+from src.image_handler import ImageHandler
+
+def _decode(encoded: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(encoded)))
+
+def test_policy_limits_dimension_and_pixels(tmp_path):
+    """Images are downscaled to the tighter of the policy's limits"""
+    path = tmp_path / "wide.jpg"
+    Image.new("RGB", (3000, 1000), "red").save(path)
+    handler = ImageHandler()
+
+    encoded = asyncio.run(handler.process_image(str(path), {"max_dimension": 1500}))
+    assert _decode(encoded).size == (1500, 500)
+
+    encoded = asyncio.run(handler.process_image(str(path), {"max_pixels": 300 * 100}))
+    assert _decode(encoded).size == (300, 100)
+
+def test_model_family_caps_tool_policy():
+    """A model family's size limit applies even when the tool allows more"""
+    policy = Config().resolution_policy("llava-phi3:latest", "read_text")
+    assert policy["max_dimension"] == 672
+    assert policy["quality"] == 95
+
+def test_small_source_is_passed_through(tmp_path):
+    """A source already within limits is not re-encoded into a larger file"""
+    path = tmp_path / "small.png"
+    Image.new("RGB", (64, 64), "white").save(path)
+    encoded = asyncio.run(ImageHandler().process_image(str(path)))
+    assert base64.b64decode(encoded) == path.read_bytes()
+
+def test_memory_budget_waits_then_rejects():
+    """Reservations beyond the budget wait for room and time out if none frees up"""
+    from src.image_handler import MemoryBudget
+
+    async def scenario():
+        budget = MemoryBudget(100, wait_timeout=0.05)
+        try:
+            await budget.acquire(101)
+            raise AssertionError("oversized reservation was accepted")
+        except ValueError:
+            pass
+
+        await budget.acquire(80)
+        try:
+            await budget.acquire(30)
+            raise AssertionError("reservation did not time out")
+        except RuntimeError:
+            pass
+
+        waiter = asyncio.ensure_future(budget.acquire(30))
+        await asyncio.sleep(0)
+        await budget.release(80)
+        await waiter
+        assert budget.in_use == 30
+
+    asyncio.run(scenario())
+
+def test_regions_crop_at_native_resolution(tmp_path):
+    """Regions are cropped from the full-size source, which is decoded only once"""
+    path = tmp_path / "screen.png"
+    image = Image.new("RGB", (4000, 2000), "white")
+    image.paste((255, 0, 0), (3000, 1000, 3200, 1100))
+    image.save(path)
+    handler = ImageHandler()
+
+    regions = [
+        {"x": 3000, "y": 1000, "width": 200, "height": 100},
+        {"x": 0, "y": 0, "width": 0.5, "height": 1, "units": "normalized"},
+    ]
+    crops = asyncio.run(handler.load_regions(str(path), regions, {"max_dimension": 1000}))
+    red = Image.open(io.BytesIO(crops[0]))
+    assert red.size == (200, 100)
+    r, g, b = red.convert("RGB").getpixel((100, 50))
+    assert r > 240 and g < 16 and b < 16
+    assert Image.open(io.BytesIO(crops[1])).size == (1000, 1000)
+    assert len(handler.decoded._entries) == 1
+
+    try:
+        asyncio.run(handler.load_regions(str(path), [{"x": 5000, "y": 0, "width": 10, "height": 10}]))
+        raise AssertionError("region outside the image was accepted")
+    except ValueError:
+        pass
@@ -0,0 +1,89 @@
+"""
+Tests for the Ollama client request body
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ollama_client import STREAM_CHUNK_SIZE, generate_body
+
+def test_generate_body_matches_json_payload():
+    # Large enough to span several chunks, with a length that is not a multiple of 3
+    raw = os.urandom(STREAM_CHUNK_SIZE * 2 + 1)
+    encoded = base64.b64encode(os.urandom(1000)).decode("utf-8")
+    payload = {"model": "llava-phi3", "prompt": "Describe \"this\"", "stream": False}
+
+    length, chunks = generate_body(payload, [raw, memoryview(raw), encoded])
+
+    async def collect():
+        return b"".join([chunk async for chunk in chunks])
+
+    body = asyncio.run(collect())
+    assert len(body) == length
+    assert json.loads(body) == {
+        **payload,
+        "images": [base64.b64encode(raw).decode("utf-8")] * 2 + [encoded],
+    }
+
+def test_preload_and_keep_alive_against_stub():
+    from benchmarks.stub_ollama import StubOllama
+    from src.config import Config
+    from src.ollama_client import OllamaClient
+
+    async def run():
+        stub = StubOllama(load_seconds=0.2)
+        config = Config()
+        config.update({"ollama_url": await stub.start(port=0)})
+        client = OllamaClient(config)
+        try:
+            await client.preload_models(["llava:7b", "missing-model"])
+            assert stub.loaded == {"llava:7b"}
+            assert client.stats["preloads"] == 1
+            # Ollama reports no load_duration for load requests; the wall clock counts
+            assert client.stats["preload_seconds"] >= 0.2
+
+            # A resident model is only refreshed, an evicted one is reloaded
+            assert await client.refresh_keep_alive(60) == []
+            stub.loaded.clear()
+            assert await client.refresh_keep_alive(60) == ["llava:7b"]
+            assert stub.loaded == {"llava:7b"}
+            # The keep-alive ping is not a load; the reload is
+            assert (client.stats["preloads"], client.stats["keep_alive_refreshes"]) == (2, 1)
+        finally:
+            await client.close()
+            await stub.stop()
+
+    asyncio.run(run())
+
+def test_retired_session_outlives_requests_started_under_its_timeout():
+    from benchmarks.stub_ollama import StubOllama
+    from src.config import Config
+    from src.ollama_client import OllamaClient
+
+    async def run():
+        stub = StubOllama(latency=1.0)
+        config = Config()
+        config.update({"ollama_url": await stub.start(port=0), "timeout": 5})
+        client = OllamaClient(config)
+        try:
+            slow = asyncio.ensure_future(client.analyze_image(b"image", "describe", "llava:7b"))
+            await asyncio.sleep(0.2)
+            client.apply_config(config.update({"timeout": 0.5}))
+
+            # The next request replaces the session; the old one is closed
+            # after its own 5s timeout, not the new 0.5s, and only once
+            await client.list_models()
+            assert client._retired_sessions == []
+            assert [s.timeout.total for s in client._close_timers] == [5]
+            assert (await slow).startswith("stub response")
+        finally:
+            await client.close()
+            await stub.stop()
+
+    asyncio.run(run())
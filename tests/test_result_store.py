@@ -0,0 +1,92 @@
+"""
+Tests for the persistent result store
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.result_store import ResultStore
+
+def test_roundtrip_survives_reopen(tmp_path):
+    """A result written by one store is visible to a fresh one"""
+    db_path = tmp_path / "results.db"
+    digest = ResultStore.digest("aGVsbG8=")
+    key = ResultStore.make_key(digest, "Describe", "llava-phi3")
+
+    store = ResultStore(str(db_path))
+    assert store.get(key) is None
+    store.put(key, digest, "Describe", "llava-phi3", None, "A cat", elapsed=1.5)
+    store.close()
+
+    reopened = ResultStore(str(db_path))
+    assert reopened.get(key) == "A cat"
+    assert reopened.stats()["hits"] == 1
+    reopened.close()
+
+def test_key_depends_on_options():
+    """Different generation options never share a cache entry"""
+    digest = ResultStore.digest(b"image")
+    assert (ResultStore.make_key(digest, "p", "m", {"num_predict": 64}) !=
+            ResultStore.make_key(digest, "p", "m", {"num_predict": 128}))
+
+def test_evicts_least_recently_used(tmp_path):
+    """Entries past the byte budget are evicted oldest access first"""
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=250)
+    keys = []
+    for i in range(3):
+        key = ResultStore.make_key(str(i), "p", "m")
+        store.put(key, str(i), "p", "m", None, "x" * 100)
+        keys.append(key)
+        if i == 1:
+            # Touch the first entry so the second one becomes the oldest
+            store.get(keys[0])
+
+    assert store.get(keys[0]) is not None
+    assert store.get(keys[1]) is None
+    assert store.get(keys[2]) is not None
+    assert store.stats()["bytes"] <= 250
+    store.close()
+
+def test_running_total_tracks_replacements_and_evictions(tmp_path):
+    """The size total kept for budget checks matches the stored rows"""
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=250)
+    key = ResultStore.make_key("0", "p", "m")
+    store.put(key, "0", "p", "m", None, "x" * 100)
+    store.put(key, "0", "p", "m", None, "x" * 40)
+    for i in range(1, 4):
+        store.put(ResultStore.make_key(str(i), "p", "m"), str(i), "p", "m", None, "y" * 80)
+
+    conn = store._connect()
+    assert ResultStore._total_size(conn) == store.stats()["bytes"] <= 250
+    store.close()
+
+def test_fallback_answers_are_stored_under_the_model_that_ran(tmp_path):
+    """A missing model's fallback answer is not served once it is pulled"""
+    from benchmarks.stub_ollama import StubOllama
+    from src.server import OllamaVisionServer
+
+    async def run():
+        stub = StubOllama(models=["llava:7b"], latency=0)
+        server = OllamaVisionServer()
+        await server.apply_config(server.config.update({
+            "ollama_url": await stub.start(port=0),
+            "cache_enabled": True,
+            "cache_path": str(tmp_path / "results.db"),
+        }))
+        try:
+            await server.analyze(b"image", "Describe", "llava:13b")
+            await server.analyze(b"image", "Describe", "llava:7b")
+            assert stub.requests == 1
+
+            stub.models.append("llava:13b")
+            await server.analyze(b"image", "Describe", "llava:13b")
+            assert stub.requests == 2
+        finally:
+            await server.close()
+            await stub.stop()
+
+    asyncio.run(run())
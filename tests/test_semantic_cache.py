@@ -0,0 +1,96 @@
+"""
+Tests for the semantic prompt cache
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# NumPy is an optional dependency of the semantic cache
+pytest.importorskip("numpy")
+
+from src.semantic_cache import SemanticCache
+
+def test_near_duplicate_prompts_hit_within_scope():
+    cache = SemanticCache(threshold=0.9)
+    cache.add("image-a", [1.0, 0.0, 0.1], "describe this image", "a cat")
+
+    response, similarity = cache.lookup("image-a", [0.9, 0.0, 0.1])
+    assert response == "a cat" and similarity > 0.99
+    assert cache.lookup("image-a", [0.0, 1.0, 0.0]) is None
+    # The same prompt about another image never matches
+    assert cache.lookup("image-b", [1.0, 0.0, 0.1]) is None
+    assert (cache.info()["lookups"], cache.info()["hits"]) == (3, 1)
+
+def test_size_is_bounded_by_evicting_least_recent_scopes():
+    cache = SemanticCache(max_entries=4)
+    cache.add("old", [1.0, 0.0], "p1", "r1")
+    cache.add("old", [0.0, 1.0], "p2", "r2")
+    cache.add("recent", [1.0, 0.0], "p1", "r1")
+    cache.lookup("old", [1.0, 0.0])
+    cache.add("new", [1.0, 0.0], "p1", "r1")
+    cache.add("new", [0.0, 1.0], "p2", "r2")
+
+    assert cache.entries <= 4
+    assert cache.lookup("recent", [1.0, 0.0]) is None
+    assert cache.lookup("old", [1.0, 0.0]) is not None
+
+def test_server_matches_questions_not_schema_text(tmp_path):
+    """Reworded questions hit, different ones miss, even with a long schema appended"""
+    from PIL import Image
+    from benchmarks.stub_ollama import StubOllama
+    from src.server import OllamaVisionServer
+
+    path = tmp_path / "street.png"
+    Image.new("RGB", (64, 48), (90, 90, 90)).save(path)
+
+    async def ask(server, prompt, schema=None):
+        arguments = {"image_path": str(path), "prompt": prompt, "model": "llava:7b"}
+        if schema:
+            arguments["schema"] = schema
+        return (await server.execute_tool("analyze_image", arguments))[0].text
+
+    async def run():
+        stub = StubOllama(latency=0)
+        server = OllamaVisionServer()
+        await server.apply_config(server.config.update({
+            "ollama_url": await stub.start(port=0),
+            "semantic_cache_enabled": True,
+        }))
+        try:
+            await ask(server, "Describe this image")
+            await ask(server, "Please describe the image")
+            assert stub.requests == 1
+            await ask(server, "How many red cars are parked on the left")
+            assert stub.requests == 2
+
+            # The shared schema text must not make unrelated questions match
+            await ask(server, "How many red cars are parked on the left", "objects")
+            await ask(server, "Which animals are visible near the river bank", "objects")
+            assert stub.requests == 4
+            await ask(server, "How many red cars are parked on the left side", "objects")
+            assert stub.requests == 4
+
+            # A failing embedding model is skipped for EMBEDDING_RETRY_DELAY
+            calls = []
+
+            async def failing_embed(texts, model=None):
+                calls.append(texts)
+                raise RuntimeError("embedding model not found")
+
+            server.ollama_client.embed = failing_embed
+            await ask(server, "Read the sign on the shop")
+            await ask(server, "What does the shop sign say")
+            assert len(calls) == 1 and stub.requests == 6
+            server._embedding_retry_at = 0.0
+            await ask(server, "Count the windows")
+            assert len(calls) == 2
+        finally:
+            await server.close()
+            await stub.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,80 @@
+"""
+Tests for structured output validation
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.result_store import ResultStore
+from src.structured import OBJECTS_SCHEMA, parse_response, resolve_format, validate
+
+def test_objects_schema_validation():
+    valid = {"objects": [{"label": "cup", "count": 2, "bbox": [10, 20, 30, 40]}]}
+    assert validate(valid, OBJECTS_SCHEMA) == []
+
+    invalid = {"objects": [{"label": "cup", "count": 0, "bbox": [10, 20, 130]}, {"count": True}]}
+    errors = validate(invalid, OBJECTS_SCHEMA)
+    assert "$.objects[0].count: 0 is below the minimum 1" in errors
+    assert "$.objects[0].bbox: expected at least 4 items" in errors
+    assert "$.objects[0].bbox[2]: 130 is above the maximum 100" in errors
+    assert "$.objects[1]: missing required property 'label'" in errors
+    assert "$.objects[1].count: expected integer, got bool" in errors
+
+def test_parse_response_and_cache_key():
+    output_format = resolve_format("objects")
+    assert output_format is OBJECTS_SCHEMA
+    assert parse_response(json.dumps({"objects": []}), output_format) == {"objects": []}
+
+    for text in ('{"objects": [', '{"items": []}'):
+        try:
+            parse_response(text, output_format)
+            raise AssertionError(f"accepted {text!r}")
+        except ValueError:
+            pass
+
+    # Free-text keys are unchanged; a schema makes a separate entry
+    free = ResultStore.make_key("digest", "prompt", "model", {})
+    assert free == ResultStore.make_key("digest", "prompt", "model", {}, None)
+    assert free != ResultStore.make_key("digest", "prompt", "model", {}, output_format)
+
+def test_structured_profile_and_region_json(tmp_path):
+    from PIL import Image
+    from benchmarks.stub_ollama import StubOllama
+    from src.server import OllamaVisionServer
+
+    path = tmp_path / "scene.png"
+    Image.new("RGB", (400, 300), (0, 120, 0)).save(path)
+
+    async def run():
+        stub = StubOllama(latency=0)
+        server = OllamaVisionServer()
+        await server.apply_config(server.config.update({"ollama_url": await stub.start(port=0)}))
+
+        # A schema raises the output cap so the JSON is not cut off
+        assert server.config.generation_options("identify_objects")["num_predict"] == 160
+        assert server.config.generation_options("identify_objects", structured=True)["num_predict"] == 768
+        assert OBJECTS_SCHEMA["properties"]["objects"]["maxItems"] == 24
+        try:
+            contents = await server.execute_tool("identify_objects", {
+                "image_path": str(path),
+                "schema": "objects",
+                "regions": [
+                    {"x": 0, "y": 0, "width": 100, "height": 100, "label": "corner"},
+                    {"x": 200, "y": 100, "width": 100, "height": 100},
+                ],
+            })
+        finally:
+            await server.close()
+            await stub.stop()
+        return contents
+
+    contents = asyncio.run(run())
+    assert len(contents) == 1
+    records = json.loads(contents[0].text)
+    assert records[0]["label"] == "corner"
+    assert records[0]["result"]["objects"][0]["label"] == "stub"
+    assert records[1]["label"] == "Region 2" and "result" in records[1]